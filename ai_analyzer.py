@@ -1,48 +1,225 @@
 import streamlit as st
-from google import genai
 import os
 import json
+import time
+import contextvars
 from PIL import Image
 import io
 import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from cache_store import MemoryLRU, PersistentCache, make_cache_key, normalize_text
+from image_utils import PerceptualIndex, content_hash, detail_thumbnail, image_fingerprint, prepare_for_ocr
+from text_compactor import EXPERIENCE_TOKEN_BUDGET, JD_TOKEN_BUDGET, compact_text
+from rate_limit import TokenBucket, backoff_delay, is_retryable_error
+from gemini_client import RateLimitedClient
+import telemetry
+
+MODEL_NAME = "gemini-2.5-flash"
+# 분석 방식: "multi"는 세 번의 개별 호출, "single"은 구조화된 응답 스키마를 사용하는 단일 호출입니다.
+ANALYSIS_MODES = ("multi", "single")
+DEFAULT_ANALYSIS_MODE = os.environ.get("JOJUN_ANALYSIS_MODE", "multi")
+BATCH_WORKERS = int(os.environ.get("JOJUN_BATCH_WORKERS", 4))
+BATCH_ITEMS_PER_MINUTE = int(os.environ.get("JOJUN_BATCH_ITEMS_PER_MINUTE", 20))
+BATCH_MAX_RETRIES = int(os.environ.get("JOJUN_BATCH_MAX_RETRIES", 4))
+# 프롬프트 문구를 바꾸면 이 값을 올려서 이전 분석 캐시가 재사용되지 않도록 합니다.
+PROMPT_VERSION = "3"
+ANALYSIS_CACHE_TTL = int(os.environ.get("JOJUN_ANALYSIS_CACHE_TTL", 7 * 24 * 3600))
+ANALYSIS_CACHE_MAX_MB = int(os.environ.get("JOJUN_ANALYSIS_CACHE_MAX_MB", 64))
+REQUIRED_COMPETENCY_KEYS = ["categories", "job_scores", "user_scores", "fit_score", "overall_comment"]
+OCR_PROMPT_VERSION = "1"
+OCR_MEMORY_CACHE_MAX_MB = int(os.environ.get("JOJUN_OCR_MEMORY_CACHE_MAX_MB", 16))
+OCR_DISK_CACHE_ENABLED = os.environ.get("JOJUN_OCR_DISK_CACHE", "1") == "1"
+# 다시 캡처한 같은 화면을 찾아 재사용하는 기능은 기본으로 꺼져 있으며, 켜더라도 같은 세션 안에서만 찾습니다.
+OCR_NEAR_DUPLICATE_ENABLED = os.environ.get("JOJUN_OCR_NEAR_DUPLICATE", "0") == "1"
+# OCR 전처리: 긴 변을 OCR_MAX_LONG_EDGE 이하(긴 캡처는 가로 폭 기준 후 세로로 분할), 해상도 정보가 있으면 OCR_TARGET_DPI 이하로 줄인 뒤 흑백으로 다시 인코딩합니다.
+# 기본 형식은 compare_ocr_preprocessing 벤치마크에서 글자 캡처의 전송량이 가장 작았던 PNG이며, 다시 인코딩한 결과가 원본보다 크면 원본을 보냅니다.
+OCR_PREPROCESS_ENABLED = os.environ.get("JOJUN_OCR_PREPROCESS", "1") == "1"
+OCR_MAX_LONG_EDGE = int(os.environ.get("JOJUN_OCR_MAX_LONG_EDGE", 1536))
+OCR_TARGET_DPI = int(os.environ.get("JOJUN_OCR_TARGET_DPI", 150))
+OCR_IMAGE_FORMAT = os.environ.get("JOJUN_OCR_IMAGE_FORMAT", "PNG").upper()
+OCR_IMAGE_QUALITY = int(os.environ.get("JOJUN_OCR_IMAGE_QUALITY", 80))
+OCR_GRAYSCALE = os.environ.get("JOJUN_OCR_GRAYSCALE", "1") == "1"
+OCR_TILE_WORKERS = int(os.environ.get("JOJUN_OCR_TILE_WORKERS", 4))
+# 미리보기 점수에 쓸 임베딩: "hashing"(네트워크 없이 수 밀리초) 또는 "gemini"(임베딩 API, 디스크 캐시)
+PREVIEW_EMBEDDER = os.environ.get("JOJUN_PREVIEW_EMBEDDER", "hashing")
+
+# 벤치마크나 오프라인 실행에서는 set_gemini_client()로 같은 인터페이스(models.generate_content 등)를 가진 가짜 클라이언트를 주입합니다.
+_client_override = None
+
+def set_gemini_client(client):
+    global _client_override
+    _client_override = client
 
-@st.cache_resource
 def get_gemini_client():
+    if _client_override is not None:
+        return _client_override
+    return _create_gemini_client()
+
+# Gemini SDK는 불러오는 데만 1초 가까이 걸리므로, 앱 시작 시가 아니라 처음 AI를 호출할 때 가져옵니다.
+@st.cache_resource
+def _create_gemini_client():
     try:
-        client = genai.Client()
-        return client
+        from google import genai
+        # 모든 세션이 이 클라이언트 하나를 공유하므로, 요청 한도와 재시도, 중복 요청 합치기를 여기서 한 번에 적용합니다.
+        return RateLimitedClient(genai.Client())
     except Exception as e:
         logging.error(f"Gemini 클라이언트 초기화 실패: {e}")
         st.error("AI 서비스를 초기화하는 데 실패했습니다. 관리자에게 문의하세요.")
         return None
 
+@st.cache_resource
+def get_analysis_cache():
+    return PersistentCache("analysis", ttl_seconds=ANALYSIS_CACHE_TTL, max_bytes=ANALYSIS_CACHE_MAX_MB * 1024 * 1024)
+
+# 작업 스레드에서도 st.error 등이 현재 세션 화면에 표시되도록 ScriptRunContext를 전달하고,
+# 호출한 쪽의 contextvars(오류 수집 등)도 함께 이어받도록 합니다.
+def with_script_ctx(fn):
+    ctx = get_script_run_ctx()
+    context = contextvars.copy_context()
+    def wrapper(*args, **kwargs):
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        return context.run(fn, *args, **kwargs)
+    return wrapper
+
+# --- Gemini 호출 ---
+# 모든 generate_content 호출을 단계(span)로 기록하여 호출별 소요 시간과 토큰 수를 성능 패널과 지표 파일에서 볼 수 있게 합니다.
+def _generate_content(client, stage, **kwargs):
+    with telemetry.span(f"gemini.{stage}", model=kwargs.get("model")) as span:
+        response = client.models.generate_content(**kwargs)
+        span.update(telemetry.usage_attrs(response))
+        return response
+
+# --- API 오류 수집 ---
+# 각 함수는 오류를 화면에 표시하고 None을 돌려주므로, 배치 분석처럼 재시도 여부를 판단해야 하는 호출자는
+# collect_api_errors()로 발생한 예외를 모아서 확인합니다.
+_api_errors = contextvars.ContextVar("jojun_api_errors", default=None)
+
+def _record_api_error(error):
+    errors = _api_errors.get()
+    if errors is not None:
+        errors.append(error)
+
+def collect_api_errors(fn, *args, **kwargs):
+    errors = []
+    token = _api_errors.set(errors)
+    try:
+        return fn(*args, **kwargs), errors
+    finally:
+        _api_errors.reset(token)
+
+# --- OCR 결과 캐시 ---
+# 메모리(LRU) → 디스크(SQLite, 선택) 순으로 이미지 바이트의 SHA-256 해시를 조회하고,
+# JOJUN_OCR_NEAR_DUPLICATE=1이면 같은 세션에서 이전에 인식한 이미지 중 다시 캡처한 같은 화면이 있는지도 확인합니다.
+_ocr_memory_cache = MemoryLRU(OCR_MEMORY_CACHE_MAX_MB * 1024 * 1024, sizeof=lambda text: len(text.encode("utf-8")))
+_near_duplicate_lock = threading.Lock()
+
+def _session_near_duplicates():
+    # 다른 사용자의 캡처 내용이 섞이지 않도록 색인은 세션마다 따로 둡니다. 세션이 없는 배치 실행에서는 쓰지 않습니다.
+    if not OCR_NEAR_DUPLICATE_ENABLED or get_script_run_ctx() is None:
+        return None
+    with _near_duplicate_lock:
+        if "_ocr_near_duplicates" not in st.session_state:
+            st.session_state["_ocr_near_duplicates"] = PerceptualIndex()
+        return st.session_state["_ocr_near_duplicates"]
+
+@st.cache_resource
+def get_ocr_disk_cache():
+    return PersistentCache("ocr", ttl_seconds=30 * 24 * 3600, max_bytes=32 * 1024 * 1024)
+
+def _ocr_cache_key(image_hash):
+    # 전처리 설정에 따라 인식 결과가 달라질 수 있으므로 설정값도 키에 포함합니다.
+    preprocess = f"{OCR_MAX_LONG_EDGE}/{OCR_TARGET_DPI}/{OCR_IMAGE_FORMAT}/{OCR_IMAGE_QUALITY}/{OCR_GRAYSCALE}" if OCR_PREPROCESS_ENABLED else "original"
+    return make_cache_key(MODEL_NAME, OCR_PROMPT_VERSION, preprocess, image_hash)
+
+def _get_cached_ocr(cache_key):
+    text = _ocr_memory_cache.get(cache_key)
+    if text is None and OCR_DISK_CACHE_ENABLED:
+        text = get_ocr_disk_cache().get(cache_key)
+        if text is not None:
+            _ocr_memory_cache.set(cache_key, text)
+    return text
+
+def _store_ocr(cache_key, text):
+    _ocr_memory_cache.set(cache_key, text)
+    if OCR_DISK_CACHE_ENABLED:
+        get_ocr_disk_cache().set(cache_key, text)
+
+def clear_ocr_cache():
+    _ocr_memory_cache.clear()
+    if OCR_DISK_CACHE_ENABLED:
+        get_ocr_disk_cache().clear()
+
 # --- Gemini Vision OCR 함수 ---
+OCR_PROMPT = "Extract all text from this image. Provide only the transcribed text, without any additional commentary or formatting."
+
+def preprocess_for_ocr(img, image_bytes=None):
+    if not OCR_PREPROCESS_ENABLED:
+        return [img]
+    with telemetry.span("ocr.preprocess", input_bytes=len(image_bytes) if image_bytes else None) as span:
+        parts = prepare_for_ocr(img, OCR_MAX_LONG_EDGE, OCR_TARGET_DPI, OCR_IMAGE_FORMAT, OCR_IMAGE_QUALITY, OCR_GRAYSCALE, original_bytes=image_bytes)
+        span.update(tiles=len(parts), output_bytes=sum(len(data) for data, _ in parts), original=parts[0][0] is image_bytes)
+    from google.genai import types
+    return [types.Part.from_bytes(data=data, mime_type=mime_type) for data, mime_type in parts]
+
+def ocr_image_parts(client, parts):
+    # 긴 캡처를 나눈 조각은 동시에 인식한 뒤 위에서부터 순서대로 이어 붙입니다.
+    def recognize(part):
+        return _generate_content(client, "ocr", model=MODEL_NAME, contents=[OCR_PROMPT, part]).text
+    if len(parts) == 1:
+        return recognize(parts[0])
+    with ThreadPoolExecutor(max_workers=min(OCR_TILE_WORKERS, len(parts))) as executor:
+        futures = [executor.submit(with_script_ctx(recognize), part) for part in parts]
+        texts = [future.result() for future in futures]
+    if all(text is None for text in texts):
+        return None
+    return "\n".join(text.strip() for text in texts if text and text.strip())
+
 def ocr_with_gemini(image_bytes):
+    with telemetry.span("ocr", input_bytes=len(image_bytes), cache_hit=False) as span:
+        return _ocr_with_gemini(image_bytes, span)
+
+def _ocr_with_gemini(image_bytes, span):
+    cache_key = _ocr_cache_key(content_hash(image_bytes))
+    cached_text = _get_cached_ocr(cache_key)
+    if cached_text is not None:
+        span["cache_hit"] = True
+        return cached_text
+
     client = get_gemini_client()
     if not client:
         return None
     
     try:
         img = Image.open(io.BytesIO(image_bytes))
-        prompt = "Extract all text from this image. Provide only the transcribed text, without any additional commentary or formatting."
-        
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=[prompt, img]
-        )
-        return response.text
+        near_duplicates = _session_near_duplicates()
+        if near_duplicates is not None:
+            fingerprint, aspect_ratio, thumbnail = image_fingerprint(img), img.width / img.height, detail_thumbnail(img)
+            similar_key = near_duplicates.find(fingerprint, aspect_ratio, thumbnail)
+            cached_text = _get_cached_ocr(similar_key) if similar_key else None
+            if cached_text is not None:
+                span.update(cache_hit=True, near_duplicate=True)
+                _store_ocr(cache_key, cached_text)
+                return cached_text
+
+        text = ocr_image_parts(client, preprocess_for_ocr(img, image_bytes))
+        if text is not None:
+            _store_ocr(cache_key, text)
+            if near_duplicates is not None:
+                near_duplicates.add(cache_key, fingerprint, aspect_ratio, thumbnail)
+        return text
     except Exception as e:
+        _record_api_error(e)
         logging.error(f"Gemini Vision API 호출 오류: {e}")
         st.error("이미지 분석 중 AI 서비스에 오류가 발생했습니다.")
         return None
 
 # --- AI 이력서 제안 함수 ---
-def get_resume_suggestions(job_description, user_experience):
-    client = get_gemini_client()
-    if not client:
-        return None
-
-    prompt = f"""
+def _build_suggestions_prompt(job_description, user_experience):
+    return f"""
     당신은 최고의 커리어 코치 AI 'JOJUN'입니다. [채용 공고]와 [지원자 경험]을 바탕으로, 지원자가 자신의 강점을 더 잘 어필하고 부족한 점을 보완할 수 있도록 이력서 문구를 3가지 구체적으로 제안해주세요.
     각 제안은 '###'로 시작해야 합니다. 각 제안은 (1) 어떤 역량을 타겟하는지 '타겟 역량', (2) 기존 경험을 어떻게 개선할지 '개선 방안', (3) 실제 이력서에 쓸 수 있는 '예시 문구'를 포함해야 합니다.
     
@@ -65,24 +242,25 @@ def get_resume_suggestions(job_description, user_experience):
     **개선 방안:** [설명]
     **예시 문구:** "[예시]"
     """
+
+def get_resume_suggestions(job_description, user_experience):
+    client = get_gemini_client()
+    if not client:
+        return None
+
+    prompt = _build_suggestions_prompt(job_description, user_experience)
     try:
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt
-        )
+        response = _generate_content(client, "suggestions", model=MODEL_NAME, contents=prompt)
         return response.text
     except Exception as e:
+        _record_api_error(e)
         logging.error(f"AI 이력서 제안 생성 오류: {e}")
         st.error(f"AI 이력서 제안 생성 중 오류가 발생했습니다: {e}")
-        return "이력서 제안을 생성하는 데 실패했습니다."
-
-# --- AI 예상 면접 질문 생성 함수 ---
-def get_interview_questions(job_description, user_experience):
-    client = get_gemini_client()
-    if not client:
         return None
 
-    prompt = f"""
+# --- AI 예상 면접 질문 생성 함수 ---
+def _build_interview_prompt(job_description, user_experience):
+    return f"""
     당신은 최고의 IT 전문 면접관 AI 'JOJUN'입니다. [채용 공고]와 [지원자 경험]을 종합적으로 분석하여, 면접에서 나올 법한 예상 질문 5개를 생성해주세요.
     - 3개는 지원자의 핵심 강점과 경험을 깊이 있게 확인하는 질문이어야 합니다.
     - 2개는 채용 공고의 요구사항에 비해 지원자의 경험이 다소 부족해 보이는 부분을 검증하는 압박 질문이어야 합니다.
@@ -110,24 +288,28 @@ def get_interview_questions(job_description, user_experience):
     ### [5. 약점/경험 검증 질문]
     **질문 의도:** [설명]
     """
+
+def get_interview_questions(job_description, user_experience):
+    client = get_gemini_client()
+    if not client:
+        return None
+
+    prompt = _build_interview_prompt(job_description, user_experience)
     try:
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt
-        )
+        response = _generate_content(client, "interview_questions", model=MODEL_NAME, contents=prompt)
         return response.text
     except Exception as e:
+        _record_api_error(e)
         logging.error(f"AI 면접 질문 생성 오류: {e}")
         st.error(f"AI 면접 질문 생성 중 오류가 발생했습니다: {e}")
-        return "면접 질문을 생성하는 데 실패했습니다."
+        return None
 
-# --- 전체 분석 실행 함수 ---
-def run_full_analysis(job_description, user_experience):
+# --- AI 역량 분석 함수 ---
+def get_competency_analysis(job_description, user_experience):
     client = get_gemini_client()
     if not client:
         return None
 
-    # 1. 역량 분석
     competency_prompt = f"""
     당신은 최고의 IT 채용 전문가 AI, 'JOJUN'입니다. [채용 공고]와 [지원자 경험]을 분석하여 다음 과업을 명확하고 객관적으로 수행해주세요.
 
@@ -153,30 +335,393 @@ def run_full_analysis(job_description, user_experience):
     }}
     """
     try:
-        competency_response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=competency_prompt,
-            config={"response_mime_type": "application/json"}
-        )
+        competency_response = _generate_content(client, "competency", model=MODEL_NAME, contents=competency_prompt, config={"response_mime_type": "application/json"})
         analysis_result = json.loads(competency_response.text)
-        
-        required_keys = ["categories", "job_scores", "user_scores", "fit_score", "overall_comment"]
-        if not all(key in analysis_result for key in required_keys):
+
+        if not all(key in analysis_result for key in REQUIRED_COMPETENCY_KEYS):
             st.error("AI 역량 분석 응답이 불완전합니다. 다시 시도해주세요.")
             logging.warning(f"Incomplete JSON from competency analysis: {analysis_result}")
             return None
+        return analysis_result
+    except Exception as e:
+        _record_api_error(e)
+        logging.error(f"AI 역량 분석 오류: {e}")
+        st.error(f"AI 역량 분석 중 오류가 발생했습니다: {e}")
+        return None
 
-        # 2. 이력서 제안 생성
-        suggestions = get_resume_suggestions(job_description, user_experience)
-        analysis_result['suggestions'] = suggestions
+# --- 단일 호출(single-shot) 분석 함수 ---
+# 역량 점수, 이력서 제안, 예상 면접 질문을 응답 스키마 하나로 받아, 입력 텍스트를 한 번만 보내고 정규식 파싱도 생략합니다.
+SINGLE_SHOT_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "categories": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "job_scores": {"type": "ARRAY", "items": {"type": "INTEGER"}},
+        "user_scores": {"type": "ARRAY", "items": {"type": "INTEGER"}},
+        "fit_score": {"type": "INTEGER"},
+        "overall_comment": {"type": "STRING"},
+        "suggestions": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {"target": {"type": "STRING"}, "guidance": {"type": "STRING"}, "example": {"type": "STRING"}},
+                "required": ["target", "guidance", "example"],
+            },
+        },
+        "interview_questions": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {"question": {"type": "STRING"}, "intent": {"type": "STRING"}},
+                "required": ["question", "intent"],
+            },
+        },
+    },
+    "required": REQUIRED_COMPETENCY_KEYS + ["suggestions", "interview_questions"],
+}
 
-        # 3. 예상 면접 질문 생성
-        interview_questions = get_interview_questions(job_description, user_experience)
-        analysis_result['interview_questions'] = interview_questions
-            
+def get_single_shot_analysis(job_description, user_experience):
+    client = get_gemini_client()
+    if not client:
+        return None
+
+    prompt = f"""
+    당신은 최고의 IT 채용 전문가이자 커리어 코치 AI, 'JOJUN'입니다. [채용 공고]와 [지원자 경험]을 분석하여 다음 과업을 모두 수행하고, 지정된 JSON 스키마로만 응답해주세요.
+
+    [과업]
+    1. **핵심 역량 5가지 선정 (categories)**: [채용 공고] 내용만을 바탕으로, 이 직무에서 가장 중요하게 요구되는 핵심 역량 5가지를 선정합니다.
+    2. **요구/보유 역량 수준 평가 (job_scores, user_scores)**: 선정된 5개 역량 각각에 대해, [채용 공고]가 요구하는 수준과 [지원자 경험]이 보유한 수준을 1점에서 100점 사이로 평가합니다.
+    3. **종합 분석 (fit_score, overall_comment)**: 종합 직무 적합도 점수를 1점에서 100점 사이로 평가하고, 지원자의 강점과 개선점을 요약한 종합 코멘트를 2~3 문장으로 작성합니다.
+    4. **이력서 제안 3가지 (suggestions)**: 각 제안마다 타겟 역량(target), 기존 경험을 어떻게 구체화하고 어떤 성과를 강조해야 하는지에 대한 개선 방안(guidance), 수치화된 성과가 포함된 예시 문구(example)를 작성합니다.
+    5. **예상 면접 질문 5개 (interview_questions)**: 앞의 3개는 지원자의 핵심 강점과 경험을 깊이 있게 확인하는 질문, 뒤의 2개는 채용 공고 요구사항에 비해 부족해 보이는 부분을 검증하는 압박 질문으로 작성하고, 각 질문마다 질문 의도(intent)를 1문장으로 작성합니다.
+
+    [채용 공고]
+    {job_description}
+
+    [지원자 경험]
+    {user_experience}
+    """
+    try:
+        response = _generate_content(client, "single", model=MODEL_NAME, contents=prompt,
+                                     config={"response_mime_type": "application/json", "response_schema": SINGLE_SHOT_RESPONSE_SCHEMA})
+        analysis_result = json.loads(response.text)
+        if not all(key in analysis_result for key in SINGLE_SHOT_RESPONSE_SCHEMA["required"]):
+            logging.warning(f"Incomplete JSON from single-shot analysis: {analysis_result}")
+            return None
         return analysis_result
+    except Exception as e:
+        _record_api_error(e)
+        logging.error(f"AI 단일 호출 분석 오류: {e}")
+        return None
 
+# --- 전체 분석 실행 함수 ---
+# 세 호출은 서로의 결과를 사용하지 않으므로 기본적으로 동시에 실행하여,
+# 전체 대기 시간을 가장 느린 호출 하나 수준으로 줄입니다.
+ANALYSIS_TASKS = {
+    "competency": get_competency_analysis,
+    "suggestions": get_resume_suggestions,
+    "interview_questions": get_interview_questions,
+}
+
+def _collect_result(key, future):
+    try:
+        return future.result()
     except Exception as e:
-        logging.error(f"AI 전체 분석 오류: {e}")
-        st.error(f"AI 분석 중 오류가 발생했습니다: {e}")
+        logging.error(f"AI 분석 작업 '{key}' 실행 오류: {e}")
+        return None
+
+def _analysis_cache_key(job_description, user_experience, mode):
+    return make_cache_key(MODEL_NAME, PROMPT_VERSION, mode, normalize_text(job_description), normalize_text(user_experience))
+
+def _run_analysis_tasks(job_description, user_experience, concurrent):
+    if concurrent:
+        with ThreadPoolExecutor(max_workers=len(ANALYSIS_TASKS), thread_name_prefix="jojun-analysis") as executor:
+            futures = {key: executor.submit(with_script_ctx(task), job_description, user_experience) for key, task in ANALYSIS_TASKS.items()}
+            return {key: _collect_result(key, future) for key, future in futures.items()}
+    return {key: task(job_description, user_experience) for key, task in ANALYSIS_TASKS.items()}
+
+def _run_single_shot(job_description, user_experience):
+    analysis_result = get_single_shot_analysis(job_description, user_experience)
+    if analysis_result is None:
+        return None
+    return {
+        "competency": {key: analysis_result[key] for key in REQUIRED_COMPETENCY_KEYS},
+        "suggestions": analysis_result["suggestions"] or None,
+        "interview_questions": analysis_result["interview_questions"] or None,
+    }
+
+def _prepare_inputs(job_description, user_experience):
+    # 공백/상용구/중복을 한 번만 정리하고, 정리된 텍스트를 모든 프롬프트가 함께 사용합니다. 상용구 제거는 공고에만 적용합니다.
+    with telemetry.span("compaction") as span:
+        job_description, jd_stats = compact_text(job_description, JD_TOKEN_BUDGET, strip_boilerplate=True)
+        user_experience, experience_stats = compact_text(user_experience, EXPERIENCE_TOKEN_BUDGET)
+        span.update(original_tokens=jd_stats["original_tokens"] + experience_stats["original_tokens"],
+                    compacted_tokens=jd_stats["compacted_tokens"] + experience_stats["compacted_tokens"])
+    return job_description, user_experience, {"jd": jd_stats, "experience": experience_stats}
+
+def _finalize_analysis(results, used_mode, compaction, cache_key, use_cache):
+    # 일부 호출이 실패하더라도 성공한 결과는 그대로 돌려줍니다.
+    if not any(results.values()):
         return None
+
+    analysis_result = dict(results["competency"] or {})
+    analysis_result['suggestions'] = results["suggestions"]
+    analysis_result['interview_questions'] = results["interview_questions"]
+    analysis_result['mode'] = used_mode
+    saved_tokens = compaction["jd"]["saved_tokens"] + compaction["experience"]["saved_tokens"]
+    analysis_result['compaction'] = {
+        **compaction,
+        "saved_tokens_per_call": saved_tokens,
+        "saved_tokens_total": saved_tokens * (1 if used_mode == "single" else len(ANALYSIS_TASKS)),
+    }
+    if results["competency"] is None:
+        st.warning("역량 분석에 실패하여 일부 결과만 표시합니다.")
+    else:
+        remember_competencies(analysis_result)
+        if use_cache and all(results.values()):
+            # 모든 호출이 성공한 완전한 결과만 캐시합니다.
+            get_analysis_cache().set(cache_key, analysis_result)
+    return analysis_result
+
+# --- 역량 색인 / 미리보기 ---
+# 분석이 끝날 때마다 역량 이름과 요구 점수를 색인에 모아, 다음 분석부터 LLM 호출 없이 예상 역량과 점수를 바로 보여줍니다.
+# numpy를 쓰는 색인 모듈은 미리보기를 처음 계산할 때 가져옵니다.
+@st.cache_resource
+def get_competency_index():
+    from competency_index import CompetencyIndex
+    return CompetencyIndex()
+
+@st.cache_resource
+def get_embedder(kind):
+    from competency_index import GeminiEmbedder, HashingEmbedder
+    return GeminiEmbedder(get_gemini_client) if kind == "gemini" else HashingEmbedder()
+
+def remember_competencies(analysis_result):
+    try:
+        get_competency_index().add(analysis_result.get("categories"), analysis_result.get("job_scores"))
+    except Exception as e:
+        logging.warning(f"역량 색인 갱신 실패: {e}")
+
+def preview_analysis(job_description, user_experience, embedder=None):
+    # 색인이 비어 있거나 비슷한 역량이 없으면 None을 돌려줍니다.
+    try:
+        return get_competency_index().preview(job_description, user_experience, get_embedder(embedder or PREVIEW_EMBEDDER))
+    except Exception as e:
+        _record_api_error(e)
+        logging.warning(f"미리보기 분석 실패: {e}")
+        return None
+
+def _lookup_analysis_cache(cache_key):
+    with telemetry.span("analysis_cache") as span:
+        cached_result = get_analysis_cache().get(cache_key)
+        span["cache_hit"] = bool(cached_result)
+        return cached_result
+
+def run_full_analysis(job_description, user_experience, concurrent=True, use_cache=True, mode=None):
+    mode = mode or DEFAULT_ANALYSIS_MODE
+    # 같은 공고/경험으로 다시 분석하면 저장된 결과를 바로 돌려줍니다.
+    cache_key = _analysis_cache_key(job_description, user_experience, mode)
+    if use_cache:
+        cached_result = _lookup_analysis_cache(cache_key)
+        if cached_result:
+            st.toast("이전에 분석한 결과를 불러왔습니다.")
+            return cached_result
+    return _run_uncached_analysis(job_description, user_experience, concurrent, use_cache, mode, cache_key)
+
+def _run_uncached_analysis(job_description, user_experience, concurrent, use_cache, mode, cache_key):
+    client = get_gemini_client()
+    if not client:
+        return None
+
+    job_description, user_experience, compaction = _prepare_inputs(job_description, user_experience)
+    results, used_mode = None, mode
+    if mode == "single":
+        results = _run_single_shot(job_description, user_experience)
+        if results is None:
+            # 단일 호출이 실패하면 기존의 세 번 호출 방식으로 다시 시도합니다.
+            logging.warning("단일 호출 분석에 실패하여 개별 호출 방식으로 전환합니다.")
+            used_mode = "multi"
+    if results is None:
+        results = _run_analysis_tasks(job_description, user_experience, concurrent)
+    return _finalize_analysis(results, used_mode, compaction, cache_key, use_cache)
+
+# --- 스트리밍 분석 실행 함수 ---
+# 화면을 점진적으로 그릴 수 있도록 (작업 이름, 값, 완료 여부) 이벤트를 차례로 돌려줍니다.
+# 역량 분석(JSON)은 완성된 뒤 한 번에, 이력서 제안과 면접 질문은 토큰이 도착할 때마다 누적 텍스트로 전달되며,
+# 마지막에 ("done", 분석 결과, True)가 옵니다.
+STREAMING_TASKS = {
+    "suggestions": (_build_suggestions_prompt, "AI 이력서 제안 생성"),
+    "interview_questions": (_build_interview_prompt, "AI 면접 질문 생성"),
+}
+
+def _stream_task(key, events, job_description, user_experience):
+    if key not in STREAMING_TASKS:
+        events.put((key, ANALYSIS_TASKS[key](job_description, user_experience), True))
+        return
+
+    build_prompt, label = STREAMING_TASKS[key]
+    text = ""
+    try:
+        with telemetry.span(f"gemini.{key}", model=MODEL_NAME, stream=True) as span:
+            started = time.perf_counter()
+            stream = get_gemini_client().models.generate_content_stream(
+                model=MODEL_NAME,
+                contents=build_prompt(job_description, user_experience)
+            )
+            for chunk in stream:
+                if chunk.text:
+                    span.setdefault("first_chunk_ms", round((time.perf_counter() - started) * 1000, 2))
+                    text += chunk.text
+                    events.put((key, text, False))
+                # 사용량은 보통 마지막 청크에 누적값으로 들어옵니다.
+                span.update(telemetry.usage_attrs(chunk))
+        events.put((key, text or None, True))
+    except Exception as e:
+        _record_api_error(e)
+        logging.error(f"{label} 오류: {e}")
+        st.error(f"{label} 중 오류가 발생했습니다: {e}")
+        events.put((key, None, True))
+
+def stream_full_analysis(job_description, user_experience, use_cache=True, mode=None):
+    mode = mode or DEFAULT_ANALYSIS_MODE
+    cache_key = _analysis_cache_key(job_description, user_experience, mode)
+    cached_result = _lookup_analysis_cache(cache_key) if use_cache else None
+    if mode == "single" or cached_result:
+        # 캐시된 결과와 단일 호출 결과는 한 번에 완성되므로 작업별 완료 이벤트만 보냅니다.
+        analysis_result = cached_result or _run_uncached_analysis(job_description, user_experience, True, use_cache, mode, cache_key)
+        if cached_result:
+            st.toast("이전에 분석한 결과를 불러왔습니다.")
+        if analysis_result:
+            competency = {key: analysis_result[key] for key in REQUIRED_COMPETENCY_KEYS} if "fit_score" in analysis_result else None
+            yield "competency", competency, True
+            yield "suggestions", analysis_result.get("suggestions"), True
+            yield "interview_questions", analysis_result.get("interview_questions"), True
+        yield "done", analysis_result, True
+        return
+
+    if not get_gemini_client():
+        yield "done", None, True
+        return
+
+    job_description, user_experience, compaction = _prepare_inputs(job_description, user_experience)
+    events = queue.Queue()
+    for key in ANALYSIS_TASKS:
+        threading.Thread(target=with_script_ctx(_stream_task), args=(key, events, job_description, user_experience), name=f"jojun-stream-{key}", daemon=True).start()
+
+    results = {}
+    while len(results) < len(ANALYSIS_TASKS):
+        key, value, finished = events.get()
+        if finished:
+            results[key] = value
+        yield key, value, finished
+    yield "done", _finalize_analysis(results, "multi", compaction, cache_key, use_cache), True
+
+# --- 배치 분석 실행 함수 ---
+# 하나의 경험을 여러 채용 공고와 비교합니다. 공고마다 결과를 즉시 JSONL에 한 줄씩 기록하므로,
+# 중간에 중단되더라도 같은 results_path로 다시 실행하면 이미 성공한 공고는 건너뜁니다.
+# 경험 내용, 분석 방식, 프롬프트 버전이 같은 실행에서 나온 기록만 이어받고, 다른 실행의 기록은 다시 분석하며 순위에서도 뺍니다.
+# job_postings: [{"id": 고유값, "title": 선택, "text": 공고 내용 또는 "url": 공고 주소}]
+def load_batch_records(results_path):
+    # 같은 공고가 여러 번 기록된 경우(실패 후 재실행) 마지막 기록을 사용합니다.
+    records = {}
+    if not os.path.exists(results_path):
+        return records
+    with open(results_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # 비정상 종료로 마지막 줄이 잘린 경우
+            records[record["id"]] = record
+    return records
+
+def rank_batch_records(records):
+    return sorted(records.values(), key=lambda record: (record["status"] == "ok", record.get("fit_score") or 0), reverse=True)
+
+def _is_complete_analysis(analysis_result):
+    return bool(analysis_result) and "fit_score" in analysis_result and bool(analysis_result.get("suggestions")) and bool(analysis_result.get("interview_questions"))
+
+def _should_retry(error):
+    # 할당량 초과/일시적 서버 오류, 그리고 공고 URL을 가져오다 생긴 네트워크 오류는 다시 시도합니다.
+    import requests
+    if isinstance(error, requests.RequestException) and not isinstance(error, requests.HTTPError):
+        return True
+    return is_retryable_error(error)
+
+def batch_run_key(user_experience, mode=None):
+    return make_cache_key(MODEL_NAME, PROMPT_VERSION, mode or DEFAULT_ANALYSIS_MODE, normalize_text(user_experience))
+
+def _analyze_posting(posting, user_experience, limiter, max_retries, mode):
+    from url_fetcher import fetch_page_text
+    # 공고마다 하나의 트레이스로 기록하여 재시도와 대기 시간까지 공고별로 확인할 수 있게 합니다.
+    with telemetry.trace("batch_posting"):
+        record = {"id": posting["id"], "title": posting.get("title"), "source": posting.get("url") or posting.get("source"), "status": "failed", "attempts": 0}
+        analysis_result = None
+        for attempt in range(max_retries + 1):
+            record["attempts"] = attempt + 1
+            errors = []
+            try:
+                job_description = posting.get("text") or fetch_page_text(posting["url"])
+                with telemetry.span("batch.rate_limit_wait"):
+                    limiter.acquire()
+                analysis_result, errors = collect_api_errors(run_full_analysis, job_description, user_experience, mode=mode)
+            except Exception as e:
+                errors.append(e)
+            if _is_complete_analysis(analysis_result) or not any(_should_retry(error) for error in errors):
+                break
+            if attempt < max_retries:
+                delay = backoff_delay(attempt)
+                logging.warning(f"공고 '{posting['id']}' 분석 재시도 ({attempt + 1}/{max_retries}), {delay:.1f}초 대기: {errors[-1] if errors else '불완전한 응답'}")
+                with telemetry.span("batch.backoff", posting_id=posting["id"], retries=1):
+                    time.sleep(delay)
+
+        if analysis_result and "fit_score" in analysis_result:
+            record.update(status="ok", fit_score=analysis_result["fit_score"], analysis=analysis_result)
+            record["title"] = record["title"] or (f"{analysis_result['categories'][0]} 직무" if analysis_result.get("categories") else None)
+        else:
+            record["error"] = str(errors[-1]) if errors else "분석 결과를 받지 못했습니다."
+        record["run_key"] = batch_run_key(user_experience, mode)
+        record["completed_at"] = time.time()
+        return record
+
+def run_batch_analysis(user_experience, job_postings, results_path, max_workers=BATCH_WORKERS, items_per_minute=BATCH_ITEMS_PER_MINUTE, max_retries=BATCH_MAX_RETRIES, mode=None, on_progress=None):
+    run_key = batch_run_key(user_experience, mode)
+    records = load_batch_records(results_path)
+    stale = sum(1 for record in records.values() if record.get("run_key") != run_key)
+    if stale:
+        logging.warning(f"'{results_path}'에 다른 경험/분석 방식/프롬프트 버전으로 기록된 공고 {stale}개가 있어 이어받지 않습니다.")
+    completed = {record_id for record_id, record in records.items() if record["status"] == "ok" and record.get("run_key") == run_key}
+    todo = [posting for posting in job_postings if posting["id"] not in completed]
+    limiter = TokenBucket(items_per_minute, capacity=max(1, min(items_per_minute, max_workers)))
+    if todo:
+        os.makedirs(os.path.dirname(os.path.abspath(results_path)), exist_ok=True)
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="jojun-batch") as executor, open(results_path, "a", encoding="utf-8") as out:
+            futures = [executor.submit(with_script_ctx(_analyze_posting), posting, user_experience, limiter, max_retries, mode) for posting in todo]
+            for done_count, future in enumerate(as_completed(futures), start=1):
+                record = future.result()
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                if on_progress:
+                    on_progress(done_count, len(todo), record)
+    records = load_batch_records(results_path)
+    return rank_batch_records({record_id: record for record_id, record in records.items() if record.get("run_key") == run_key})
+
+# --- 배치 미리보기 ---
+# LLM 호출 없이 역량 색인만으로 공고를 빠르게 훑어 순위를 매깁니다. 상위 공고만 골라 전체 분석을 돌릴 때 씁니다.
+def run_batch_preview(user_experience, job_postings, embedder=None):
+    from url_fetcher import fetch_page_text
+    records = []
+    for posting in job_postings:
+        record = {"id": posting["id"], "title": posting.get("title"), "source": posting.get("url") or posting.get("source"), "status": "failed"}
+        try:
+            # 전체 분석으로 넘길 때 다시 가져오지 않도록 공고 본문을 채워 둡니다.
+            posting["text"] = posting.get("text") or fetch_page_text(posting["url"])
+            preview = preview_analysis(posting["text"], user_experience, embedder)
+        except Exception as e:
+            preview = None
+            record["error"] = str(e)
+        if preview:
+            record.update(status="preview", fit_score=preview["fit_score"], analysis=preview)
+        else:
+            record.setdefault("error", "색인에 비슷한 역량이 없어 미리보기를 만들지 못했습니다.")
+        records.append(record)
+    return sorted(records, key=lambda record: (record["status"] == "preview", record.get("fit_score") or 0), reverse=True)
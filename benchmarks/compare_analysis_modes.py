@@ -0,0 +1,108 @@
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dotenv import load_dotenv
+import ai_analyzer
+
+# 개별 호출(multi) 방식과 단일 호출(single) 방식의 지연 시간, 호출 수, 토큰 사용량을 실제 Gemini API로 비교합니다.
+# 사용법: python benchmarks/compare_analysis_modes.py --runs 3 [--jd 공고.txt --experience 경험.txt] [--record 응답.json | --fake]
+# --record로 실제 응답을 저장해 두면 run_benchmarks.py --recording에서 재생할 수 있습니다.
+
+SAMPLE_JD = """
+[백엔드 개발자 채용]
+주요 업무
+- Python/FastAPI 기반 채용 플랫폼 API 설계 및 개발
+- 대용량 트래픽 처리를 위한 캐시 및 비동기 작업 큐 설계
+- AWS 인프라 운영 및 CI/CD 파이프라인 개선
+자격 요건
+- 백엔드 개발 경력 3년 이상
+- RDBMS(PostgreSQL, MySQL) 설계 및 쿼리 튜닝 경험
+- Docker, Kubernetes 환경에서의 서비스 운영 경험
+우대 사항
+- LLM/생성형 AI API를 활용한 서비스 개발 경험
+- 대규모 트래픽 환경에서의 장애 대응 경험
+"""
+
+SAMPLE_EXPERIENCE = """
+- 스타트업에서 Django 기반 커머스 백엔드 2년 6개월 개발
+- 주문 API 응답 시간을 Redis 캐시 도입으로 800ms에서 120ms로 단축
+- GitHub Actions로 배포 자동화, 배포 시간 40분 → 8분
+- Gemini API를 활용한 상품 설명 자동 생성 기능 개발 (월 1만 건 처리)
+- PostgreSQL 인덱스 재설계로 정산 배치 시간 50% 단축
+"""
+
+class UsageRecordingClient:
+    def __init__(self, client):
+        self._client = client
+        self._lock = threading.Lock()
+        self.models = self
+        self.calls = []
+
+    def generate_content(self, **kwargs):
+        response = self._client.models.generate_content(**kwargs)
+        usage = getattr(response, "usage_metadata", None)
+        with self._lock:
+            self.calls.append({
+                "prompt_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+                "output_tokens": getattr(usage, "candidates_token_count", 0) or 0,
+            })
+        return response
+
+def run_mode(recorder, mode, job_description, user_experience, runs):
+    latencies, calls, prompt_tokens, output_tokens, failures = [], [], [], [], 0
+    for _ in range(runs):
+        recorder.calls.clear()
+        started = time.perf_counter()
+        result = ai_analyzer.run_full_analysis(job_description, user_experience, use_cache=False, mode=mode)
+        latencies.append(time.perf_counter() - started)
+        if not result or result.get("mode") != mode:
+            failures += 1
+        calls.append(len(recorder.calls))
+        prompt_tokens.append(sum(call["prompt_tokens"] for call in recorder.calls))
+        output_tokens.append(sum(call["output_tokens"] for call in recorder.calls))
+    return {
+        "mode": mode,
+        "median_s": statistics.median(latencies),
+        "max_s": max(latencies),
+        "calls": statistics.mean(calls),
+        "prompt_tokens": statistics.mean(prompt_tokens),
+        "output_tokens": statistics.mean(output_tokens),
+        "failures": failures,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="JOJUN 분석 방식(multi/single) 비교 벤치마크")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--jd", help="채용 공고 텍스트 파일 경로")
+    parser.add_argument("--experience", help="지원자 경험 텍스트 파일 경로")
+    parser.add_argument("--record", help="실제 응답을 가짜 클라이언트용 JSON으로 저장할 경로")
+    parser.add_argument("--fake", action="store_true", help="실제 API 대신 가짜 클라이언트로 실행 (네트워크 없이 동작 확인용)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    job_description = open(args.jd, encoding="utf-8").read() if args.jd else SAMPLE_JD
+    user_experience = open(args.experience, encoding="utf-8").read() if args.experience else SAMPLE_EXPERIENCE
+
+    from fake_client import FakeGeminiClient, RecordingClient
+    client = FakeGeminiClient() if args.fake else ai_analyzer.get_gemini_client()
+    if args.record:
+        client = RecordingClient(client)
+    recorder = UsageRecordingClient(client)
+    ai_analyzer.set_gemini_client(recorder)
+
+    rows = [run_mode(recorder, mode, job_description, user_experience, args.runs) for mode in ai_analyzer.ANALYSIS_MODES]
+    print(f"{'mode':<8}{'median(s)':>11}{'max(s)':>9}{'calls':>7}{'prompt tok':>12}{'output tok':>12}{'failures':>10}")
+    for row in rows:
+        print(f"{row['mode']:<8}{row['median_s']:>11.2f}{row['max_s']:>9.2f}{row['calls']:>7.1f}{row['prompt_tokens']:>12.0f}{row['output_tokens']:>12.0f}{row['failures']:>10}")
+    if args.record:
+        client.save(args.record)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import argparse
+import difflib
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dotenv import load_dotenv
+from PIL import Image
+from google import genai
+import ai_analyzer
+import corpus
+from image_utils import estimate_vision_tokens, prepare_for_ocr
+
+# OCR 전처리 설정별로 전송 크기, 예상 비전 토큰, 전처리 시간, OCR 지연 시간, 인식 품질을 비교합니다.
+# 사용법: python benchmarks/compare_ocr_preprocessing.py [--images a.png b.jpg] [--runs 3] [--fake]
+# 합성 표본은 그려 넣은 글자를 정답으로, --images로 준 이미지는 원본(전처리 없음) 인식 결과를 기준으로 유사도를 계산합니다.
+# --fake는 네트워크 없이 크기/토큰/전처리 시간과 분할 조각의 동시 처리만 확인하며, 유사도는 표시하지 않습니다.
+
+# 설정마다 원본 바이트를 함께 넘기므로, 다시 인코딩한 결과가 원본보다 크면 앱과 같이 원본을 그대로 보냅니다.
+SETTINGS = {
+    "original": None,
+    "png_1536": {"max_long_edge": 1536, "fmt": "PNG"},
+    "jpeg_1536": {"max_long_edge": 1536, "fmt": "JPEG", "quality": 80},
+    "jpeg_1024": {"max_long_edge": 1024, "fmt": "JPEG", "quality": 70},
+    "webp_1536": {"max_long_edge": 1536, "fmt": "WEBP", "quality": 80},
+    "color_jpeg_1536": {"max_long_edge": 1536, "fmt": "JPEG", "quality": 80, "grayscale": False},
+}
+
+def build_parts(image_bytes, settings):
+    img = Image.open(io.BytesIO(image_bytes))
+    if settings is None:
+        # 전처리하지 않으면 SDK가 원본 이미지를 PNG로 다시 인코딩해 보냅니다.
+        return [img], len(image_bytes), estimate_vision_tokens(*img.size)
+    parts = prepare_for_ocr(img, **settings, original_bytes=image_bytes)
+    tokens = sum(estimate_vision_tokens(*Image.open(io.BytesIO(data)).size) for data, _ in parts)
+    return [genai.types.Part.from_bytes(data=data, mime_type=mime_type) for data, mime_type in parts], sum(len(data) for data, _ in parts), tokens
+
+def similarity(reference, text):
+    if not reference or not text:
+        return None
+    normalize = lambda value: " ".join(value.split()).lower()
+    return difflib.SequenceMatcher(None, normalize(reference), normalize(text)).ratio()
+
+def run_sample(client, name, image_bytes, reference, runs, live):
+    rows = []
+    for setting, options in SETTINGS.items():
+        prepare_times, ocr_times, text = [], [], None
+        for _ in range(runs):
+            started = time.perf_counter()
+            parts, payload_bytes, tokens = build_parts(image_bytes, options)
+            prepare_times.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            text = ai_analyzer.ocr_image_parts(client, parts)
+            ocr_times.append(time.perf_counter() - started)
+        if setting == "original" and reference is None:
+            reference = text
+        rows.append({
+            "image": name, "setting": setting, "tiles": len(parts), "payload_kb": payload_bytes / 1024, "tokens": tokens,
+            "prepare_ms": statistics.median(prepare_times) * 1000, "ocr_s": statistics.median(ocr_times),
+            "similarity": similarity(reference, text) if live else None,
+        })
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="JOJUN OCR 전처리 설정 비교 벤치마크")
+    parser.add_argument("--images", nargs="+", help="비교할 이미지 파일 (없으면 합성 표본 사용)")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--fake", action="store_true", help="실제 API 대신 가짜 클라이언트로 실행 (네트워크 없이 동작 확인용)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    if args.images:
+        samples = [(os.path.basename(path), open(path, "rb").read(), None) for path in args.images]
+    else:
+        samples = corpus.make_ocr_samples()
+
+    from fake_client import FakeGeminiClient
+    client = FakeGeminiClient() if args.fake else ai_analyzer.get_gemini_client()
+    rows = []
+    for name, image_bytes, reference in samples:
+        rows += run_sample(client, name, image_bytes, reference, args.runs, live=not args.fake)
+
+    print(f"{'image':<16}{'setting':<17}{'tiles':>6}{'payload(KB)':>13}{'tokens':>8}{'prep(ms)':>10}{'ocr(s)':>8}{'similarity':>12}")
+    for row in rows:
+        score = f"{row['similarity']:.3f}" if row["similarity"] is not None else "-"
+        print(f"{row['image']:<16}{row['setting']:<17}{row['tiles']:>6}{row['payload_kb']:>13.1f}{row['tokens']:>8}{row['prepare_ms']:>10.1f}{row['ocr_s']:>8.2f}{score:>12}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import io
+import random
+
+# --- 벤치마크용 합성 코퍼스 ---
+# 실제 이력서/공고 대신 크기를 조절할 수 있는 합성 텍스트와 PDF/PPTX/이미지 파일을 만듭니다.
+# 같은 seed면 항상 같은 내용이 나오므로 실행 간 결과를 비교할 수 있습니다.
+
+SIZES = {"small": 1, "medium": 4, "large": 16}
+
+JD_SECTIONS = {
+    "주요 업무": [
+        "Python/FastAPI 기반 채용 플랫폼 API 설계 및 개발", "대용량 트래픽 처리를 위한 캐시 및 비동기 작업 큐 설계",
+        "AWS 인프라 운영 및 CI/CD 파이프라인 개선", "데이터 파이프라인 구축 및 배치 작업 최적화",
+        "사내 관리자 도구 개발 및 운영", "검색 및 추천 시스템 백엔드 개발",
+    ],
+    "자격 요건": [
+        "백엔드 개발 경력 3년 이상", "RDBMS(PostgreSQL, MySQL) 설계 및 쿼리 튜닝 경험",
+        "Docker, Kubernetes 환경에서의 서비스 운영 경험", "REST API 설계 원칙에 대한 이해",
+        "Git 기반 협업 경험", "테스트 코드 작성에 익숙하신 분",
+    ],
+    "우대 사항": [
+        "LLM/생성형 AI API를 활용한 서비스 개발 경험", "대규모 트래픽 환경에서의 장애 대응 경험",
+        "Kafka 등 메시지 큐 운영 경험", "오픈소스 기여 경험", "모니터링 및 관측성 도구 구축 경험",
+    ],
+}
+JD_BOILERPLATE = ["채용 홈", "로그인", "회원가입", "Copyright © 2025 JOJUN Corp. All rights reserved.", "개인정보처리방침", "이용약관"]
+
+EXPERIENCE_LINES = [
+    "스타트업에서 Django 기반 커머스 백엔드 개발",
+    "주문 API 응답 시간을 Redis 캐시 도입으로 800ms에서 120ms로 단축",
+    "GitHub Actions로 배포 자동화, 배포 시간 40분 → 8분",
+    "Gemini API를 활용한 상품 설명 자동 생성 기능 개발 (월 1만 건 처리)",
+    "PostgreSQL 인덱스 재설계로 정산 배치 시간 50% 단축",
+    "Celery 기반 비동기 작업 큐 도입으로 이미지 처리 처리량 3배 향상",
+    "Sentry와 Grafana로 에러 모니터링 대시보드 구축",
+    "신규 입사자 온보딩 문서 작성 및 코드 리뷰 문화 정착 주도",
+    "AWS RDS 읽기 복제본 도입으로 조회 트래픽 분산",
+    "결제 모듈 리팩토링으로 장애 발생 건수 월 5건 → 0건",
+]
+
+# PDF 기본 글꼴(Helvetica)은 한글을 표시할 수 없으므로 PDF 본문은 영문으로 만듭니다.
+ENGLISH_LINES = [
+    "Designed and operated Python backend services for a commerce platform.",
+    "Reduced order API latency from 800ms to 120ms by introducing a Redis cache.",
+    "Automated deployments with GitHub Actions, cutting release time from 40 to 8 minutes.",
+    "Redesigned PostgreSQL indexes, halving the settlement batch runtime.",
+    "Built an asynchronous job queue with Celery and tripled image throughput.",
+    "Led code review practices and wrote onboarding documentation for new hires.",
+]
+
+# 역량 색인 벤치마크용 역량 이름 조각
+COMPETENCY_TERMS = ["Python", "Java", "백엔드", "프론트엔드", "데이터베이스", "클라우드", "AWS", "Kubernetes", "CI/CD", "API", "데이터 파이프라인",
+                    "검색", "추천 시스템", "보안", "테스트 자동화", "모니터링", "장애 대응", "협업", "커뮤니케이션", "문제 해결", "프로젝트 관리", "LLM"]
+COMPETENCY_SUFFIXES = ["개발", "설계", "운영", "역량", "경험", "능력", "최적화", "아키텍처"]
+
+def make_competency_phrases(count=500, seed=0):
+    # 과거 분석에서 나온 역량 이름처럼 (이름, 요구 점수) 목록을 만듭니다.
+    rng = random.Random(seed)
+    combinations = [f"{term} {suffix}" for term in COMPETENCY_TERMS for suffix in COMPETENCY_SUFFIXES]
+    rng.shuffle(combinations)
+    phrases = combinations[:count]
+    while len(phrases) < count:
+        phrases.append(f"{rng.choice(COMPETENCY_TERMS)} {rng.choice(COMPETENCY_TERMS)} {rng.choice(COMPETENCY_SUFFIXES)} {len(phrases)}")
+    return [(phrase, rng.randint(40, 95)) for phrase in phrases]
+
+def make_job_description(size="medium", seed=0):
+    rng = random.Random(seed)
+    lines = [f"[백엔드 개발자 채용 #{seed}]"]
+    for _ in range(SIZES[size]):
+        for section, items in JD_SECTIONS.items():
+            lines.append(section)
+            lines.extend(f"- {item}" for item in rng.sample(items, k=min(4, len(items))))
+    # 웹 페이지에서 복사한 공고처럼 메뉴/푸터 문구를 섞어 압축 단계도 함께 측정합니다.
+    lines.extend(JD_BOILERPLATE * SIZES[size])
+    return "\n".join(lines)
+
+def make_experience(size="medium", seed=0):
+    rng = random.Random(seed + 1000)
+    lines = []
+    for project in range(SIZES[size] * 2):
+        lines.append(f"## 프로젝트 {project + 1}")
+        lines.extend(f"- {line}" for line in rng.sample(EXPERIENCE_LINES, k=5))
+    return "\n".join(lines)
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def make_pdf(pages=4, lines_per_page=30, seed=0):
+    # PyPDF2로 읽을 수 있는 최소한의 PDF를 직접 만듭니다 (글꼴 하나, 페이지마다 텍스트 스트림 하나).
+    rng = random.Random(seed)
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for _ in range(pages):
+        page_id, content_id = len(objects) + 1, len(objects) + 2
+        kids.append(page_id)
+        text_ops = "".join(f"({_pdf_escape(rng.choice(ENGLISH_LINES))}) Tj T* " for _ in range(lines_per_page))
+        stream = f"BT /F1 10 Tf 14 TL 50 780 Td {text_ops}ET".encode("latin-1")
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id)
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % kid for kid in kids), pages)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, obj)
+    xref_offset = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return bytes(out)
+
+def make_pptx(slides=5, seed=0):
+    from pptx import Presentation
+    from pptx.util import Inches
+    rng = random.Random(seed)
+    presentation = Presentation()
+    for number in range(slides):
+        slide = presentation.slides.add_slide(presentation.slide_layouts[6])
+        textbox = slide.shapes.add_textbox(Inches(0.5), Inches(0.5), Inches(9), Inches(6))
+        textbox.text_frame.text = f"프로젝트 {number + 1}"
+        for line in rng.sample(EXPERIENCE_LINES, k=4):
+            textbox.text_frame.add_paragraph().text = line
+    buffer = io.BytesIO()
+    presentation.save(buffer)
+    return buffer.getvalue()
+
+def make_screenshot(width=1200, height=1600, seed=0, fmt="PNG", font_size=None, dpi=None, color=False):
+    # 캡처한 공고 이미지처럼 흰 배경에 글자 줄이 있는 이미지와 그려 넣은 글자를 함께 돌려줍니다.
+    # seed마다 줄 배치가 달라 중복 판정에 걸리지 않습니다. font_size를 주면 고해상도 캡처처럼 큰 글꼴을 씁니다.
+    from PIL import Image, ImageDraw, ImageFont
+    rng = random.Random(seed)
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=font_size) if font_size else None
+    # 기본 글꼴(약 11px)일 때의 줄 간격은 14~40px입니다.
+    min_gap, max_gap = (int(font_size * 1.3), int(font_size * 3.5)) if font_size else (14, 40)
+    lines, y = [], 20
+    while y < height - (font_size or 0) - 20:
+        x = rng.randint(10, 60)
+        line = rng.choice(ENGLISH_LINES)
+        fill = (rng.randint(0, 120), rng.randint(0, 120), rng.randint(60, 160)) if color else (rng.randint(0, 60),) * 3
+        draw.text((x, y), line, fill=fill, font=font)
+        lines.append(line)
+        y += rng.randint(min_gap, max_gap)
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt, **({"dpi": (dpi, dpi)} if dpi else {}))
+    return buffer.getvalue(), "\n".join(lines)
+
+def make_image(width=1200, height=1600, seed=0, fmt="PNG"):
+    return make_screenshot(width, height, seed, fmt)[0]
+
+def make_ocr_samples(seed=0):
+    # OCR 전처리 비교용 표본: 고해상도(레티나) 화면 캡처, 세로로 긴 공고 캡처, 작은 캡처
+    return [
+        ("retina_capture", *make_screenshot(2880, 1800, seed, font_size=36, dpi=144, color=True)),
+        ("tall_posting", *make_screenshot(1080, 7200, seed + 1, font_size=30, color=True)),
+        ("small_capture", *make_screenshot(640, 360, seed + 2, font_size=18)),
+    ]
+
+def make_file_set(size="medium", seed=0):
+    # parse_input_files에 올라오는 것과 같은 (파일 이름, 바이트) 목록을 만듭니다.
+    scale = SIZES[size]
+    return [
+        (f"resume_{seed}.pdf", make_pdf(pages=2 * scale, seed=seed)),
+        (f"portfolio_{seed}.pptx", make_pptx(slides=3 * scale, seed=seed)),
+        (f"jd_capture_{seed}.png", make_image(height=800 * scale, seed=seed)),
+        (f"notes_{seed}.md", make_experience(size, seed).encode("utf-8")),
+    ]
+
+def make_job_page_html(size="medium", seed=0):
+    body = "".join(f"<p>{line}</p>" for line in make_job_description(size, seed).splitlines())
+    nav = "".join(f"<li><a href='#'>{label}</a></li>" for label in JD_BOILERPLATE[:3])
+    return f"<html><head><title>채용</title><script>var x = 1;</script></head><body><nav><ul>{nav}</ul></nav><main>{body}</main><footer>{JD_BOILERPLATE[3]}</footer></body></html>"
@@ -0,0 +1,223 @@
+import json
+import random
+import threading
+import time
+
+# --- 오프라인 벤치마크용 가짜 Gemini 클라이언트 ---
+# genai.Client와 같은 모양(client.models.generate_content / generate_content_stream / embed_content)을 흉내 내며,
+# 기록해 둔 응답을 지연 시간 분포에 맞춰 돌려줍니다. 임베딩은 HashingEmbedder로 만든 벡터를 돌려줍니다. ai_analyzer.set_gemini_client()로 주입해서 사용합니다.
+
+DEFAULT_RESPONSES = {
+    "competency": [json.dumps({
+        "categories": ["Python 백엔드 개발", "데이터베이스 설계", "클라우드 인프라", "협업 및 커뮤니케이션", "문제 해결 능력"],
+        "job_scores": [90, 80, 70, 60, 75],
+        "user_scores": [80, 70, 55, 70, 75],
+        "fit_score": 78,
+        "overall_comment": "지원자는 Python 백엔드 개발 경험이 풍부하여 핵심 요구사항에 부합합니다. 다만 클라우드 인프라 운영 경험은 보완이 필요합니다.",
+    }, ensure_ascii=False)],
+    "suggestions": ["""### 타겟 역량: 클라우드 인프라
+**개선 방안:** 배포 자동화 경험을 AWS 운영 관점에서 구체적인 수치와 함께 서술하세요.
+**예시 문구:** "GitHub Actions와 AWS ECS로 배포 파이프라인을 구축하여 배포 시간을 40분에서 8분으로 단축"
+
+### 타겟 역량: 데이터베이스 설계
+**개선 방안:** 인덱스 재설계 경험을 쿼리 성능 지표와 함께 강조하세요.
+**예시 문구:** "PostgreSQL 인덱스 재설계로 정산 배치 시간을 50% 단축"
+
+### 타겟 역량: Python 백엔드 개발
+**개선 방안:** 트래픽 규모와 응답 시간 개선 결과를 함께 제시하세요.
+**예시 문구:** "Redis 캐시 도입으로 주문 API 응답 시간을 800ms에서 120ms로 개선"
+"""],
+    "interview_questions": ["""### [1. 강점 확인 질문] Redis 캐시를 도입할 때 캐시 무효화 전략은 어떻게 설계했나요?
+**질문 의도:** 캐시 설계에 대한 깊이 있는 이해를 확인합니다.
+
+### [2. 강점 확인 질문] 배포 자동화로 배포 시간을 단축한 과정을 설명해주세요.
+**질문 의도:** CI/CD 개선 경험의 주도성을 확인합니다.
+
+### [3. 강점 확인 질문] 인덱스 재설계 시 어떤 지표로 효과를 검증했나요?
+**질문 의도:** 데이터 기반 문제 해결 능력을 확인합니다.
+
+### [4. 약점/경험 검증 질문] Kubernetes 환경에서 서비스를 운영해 본 경험이 있나요?
+**질문 의도:** 공고의 컨테이너 운영 요구사항 충족 여부를 검증합니다.
+
+### [5. 약점/경험 검증 질문] 대규모 트래픽 장애를 겪었다면 어떻게 대응했나요?
+**질문 의도:** 장애 대응 경험의 부족 여부를 검증합니다.
+"""],
+    "ocr": ["[채용 공고]\n백엔드 개발자\n자격 요건: Python 3년 이상, AWS 운영 경험\n우대 사항: 대규모 트래픽 처리 경험"],
+}
+DEFAULT_RESPONSES["single"] = [json.dumps({
+    **json.loads(DEFAULT_RESPONSES["competency"][0]),
+    "suggestions": [
+        {"target": "클라우드 인프라", "guidance": "배포 자동화 경험을 AWS 운영 관점에서 서술하세요.", "example": "배포 시간을 40분에서 8분으로 단축"},
+        {"target": "데이터베이스 설계", "guidance": "쿼리 성능 지표와 함께 강조하세요.", "example": "정산 배치 시간을 50% 단축"},
+        {"target": "Python 백엔드 개발", "guidance": "트래픽 규모와 개선 결과를 제시하세요.", "example": "API 응답 시간을 800ms에서 120ms로 개선"},
+    ],
+    "interview_questions": [
+        {"question": "캐시 무효화 전략은 어떻게 설계했나요?", "intent": "캐시 설계 이해도 확인"},
+        {"question": "배포 자동화 과정을 설명해주세요.", "intent": "CI/CD 주도성 확인"},
+        {"question": "인덱스 재설계 효과를 어떻게 검증했나요?", "intent": "데이터 기반 문제 해결 확인"},
+        {"question": "Kubernetes 운영 경험이 있나요?", "intent": "컨테이너 운영 요구사항 검증"},
+        {"question": "대규모 장애 대응 경험이 있나요?", "intent": "장애 대응 경험 검증"},
+    ],
+}, ensure_ascii=False)]
+
+# 호출 종류별 지연 시간(초): 로그 정규 분포의 중앙값과 sigma. 실제 gemini-2.5-flash 응답 시간의 대략적인 형태를 흉내 냅니다.
+DEFAULT_LATENCY = {
+    "competency": (4.0, 0.35),
+    "suggestions": (6.0, 0.35),
+    "interview_questions": (5.0, 0.35),
+    "single": (9.0, 0.35),
+    "ocr": (3.0, 0.3),
+    "embedding": (0.3, 0.2),
+}
+
+class LatencyModel:
+    def __init__(self, profile=None, scale=1.0, seed=0):
+        self.profile = {**DEFAULT_LATENCY, **(profile or {})}
+        self.scale = scale
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self, kind):
+        median, sigma = self.profile.get(kind, (1.0, 0.3))
+        with self._lock:
+            return self.scale * median * self._random.lognormvariate(0, sigma)
+
+class FakeUsage:
+    def __init__(self, prompt_token_count, candidates_token_count):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+        self.total_token_count = prompt_token_count + candidates_token_count
+
+class FakeResponse:
+    def __init__(self, text, prompt_tokens=0):
+        self.text = text
+        self.usage_metadata = FakeUsage(prompt_tokens, max(1, len(text) // 2))
+
+def classify_request(contents, config=None):
+    # ai_analyzer의 프롬프트와 설정을 보고 어떤 호출인지 구분합니다.
+    config = config or {}
+    if isinstance(contents, list):
+        return "ocr"
+    if "response_schema" in config:
+        return "single"
+    if config.get("response_mime_type") == "application/json":
+        return "competency"
+    if "면접관" in contents:
+        return "interview_questions"
+    return "suggestions"
+
+def _prompt_tokens(contents):
+    from text_compactor import estimate_tokens
+    if isinstance(contents, list):
+        return sum(estimate_tokens(part) if isinstance(part, str) else 258 for part in contents)
+    return estimate_tokens(contents)
+
+class FakeEmbedding:
+    def __init__(self, values):
+        self.values = values
+
+class FakeEmbedResponse:
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+class _FakeModels:
+    def __init__(self, client):
+        self._client = client
+
+    def generate_content(self, model, contents, config=None):
+        return self._client._respond(model, contents, config, stream=False)
+
+    def generate_content_stream(self, model, contents, config=None):
+        return self._client._respond(model, contents, config, stream=True)
+
+    def embed_content(self, model, contents, config=None):
+        return self._client._embed(contents, config)
+
+class FakeGeminiClient:
+    def __init__(self, responses=None, latency=None, stream_chunks=8, failure_rate=0.0, seed=0):
+        self.responses = {**DEFAULT_RESPONSES, **(responses or {})}
+        self.latency = latency or LatencyModel(seed=seed)
+        self.stream_chunks = stream_chunks
+        self.failure_rate = failure_rate
+        self.models = _FakeModels(self)
+        self.calls = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_recording(cls, path, **kwargs):
+        # RecordingClient로 저장한 JSON({"종류": [응답 텍스트, ...]})을 불러옵니다.
+        with open(path, encoding="utf-8") as f:
+            return cls(responses=json.load(f), **kwargs)
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+
+    def _pick(self, kind):
+        with self._lock:
+            return self._random.choice(self.responses[kind]), self._random.random() < self.failure_rate
+
+    def _respond(self, model, contents, config, stream):
+        kind = classify_request(contents, config)
+        text, should_fail = self._pick(kind)
+        delay = self.latency.sample(kind)
+        prompt_tokens = _prompt_tokens(contents)
+        with self._lock:
+            self.calls.append({"kind": kind, "latency_s": delay, "prompt_tokens": prompt_tokens, "stream": stream})
+        if should_fail:
+            time.sleep(delay / 4)
+            from google.genai import errors
+            raise errors.ServerError(503, {"error": {"message": "fake overload", "status": "UNAVAILABLE"}})
+        if not stream:
+            time.sleep(delay)
+            return FakeResponse(text, prompt_tokens)
+        return self._stream(text, delay, prompt_tokens)
+
+    def _embed(self, contents, config):
+        from competency_index import HashingEmbedder
+        texts = [contents] if isinstance(contents, str) else list(contents)
+        delay = self.latency.sample("embedding")
+        with self._lock:
+            self.calls.append({"kind": "embedding", "latency_s": delay, "prompt_tokens": _prompt_tokens(texts), "stream": False})
+        time.sleep(delay)
+        dimensions = (config or {}).get("output_dimensionality") or 768
+        return FakeEmbedResponse([FakeEmbedding(vector.tolist()) for vector in HashingEmbedder(dimensions).embed(texts)])
+
+    def _stream(self, text, delay, prompt_tokens):
+        # 첫 청크까지 전체 지연의 30%, 나머지는 청크마다 고르게 나눠 흘려보냅니다.
+        size = max(1, len(text) // self.stream_chunks)
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        time.sleep(delay * 0.3)
+        for chunk in chunks:
+            yield FakeResponse(chunk, prompt_tokens)
+            time.sleep(delay * 0.7 / len(chunks))
+
+# --- 실제 응답 기록 ---
+class RecordingClient:
+    # 실제 클라이언트를 감싸 응답 텍스트를 종류별로 모아 두었다가 save()로 FakeGeminiClient용 JSON을 만듭니다.
+    def __init__(self, client):
+        self._client = client
+        self.models = self
+        self.recorded = {}
+        self._lock = threading.Lock()
+
+    def _record(self, contents, config, text):
+        with self._lock:
+            self.recorded.setdefault(classify_request(contents, config), []).append(text)
+
+    def generate_content(self, model, contents, config=None):
+        response = self._client.models.generate_content(model=model, contents=contents, config=config)
+        self._record(contents, config, response.text)
+        return response
+
+    def generate_content_stream(self, model, contents, config=None):
+        text = ""
+        for chunk in self._client.models.generate_content_stream(model=model, contents=contents, config=config):
+            text += chunk.text or ""
+            yield chunk
+        self._record(contents, config, text)
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.recorded, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,93 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# --- 앱 시작 / 재실행 시간 측정 ---
+# 새 파이썬 프로세스에서 jojun_app.py를 AppTest로 처음 실행하는 시간(새 작업자의 첫 화면)과,
+# 같은 세션에서 다시 실행하는 시간(위젯을 조작할 때마다 드는 비용)을 잽니다.
+# 자식 프로세스는 python -X importtime으로 실행하여, 첫 실행 동안 불러온 모듈별 가져오기 시간도 함께 보여줍니다.
+# 사용법: python benchmarks/profile_startup.py [--reruns 20] [--top 15] [--json out.json]
+
+# 첫 화면에는 필요 없어 기능을 처음 쓸 때 가져와야 하는 모듈입니다.
+# numpy(붙여넣기 버튼 컴포넌트가 쓰는 pyarrow)와 plotly(st.plotly_chart)는 Streamlit이 직접 불러오므로 목록에서 뺐습니다.
+DEFERRED_MODULES = ["google.genai", "PyPDF2", "pptx", "lxml.html", "requests"]
+
+def run_child(reruns):
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(os.path.join(ROOT, "jojun_app.py"), default_timeout=120)
+    started = time.perf_counter()
+    at.run()
+    first_run_s = time.perf_counter() - started
+    loaded = [name for name in DEFERRED_MODULES if name in sys.modules]
+    rerun_times = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        at.run()
+        rerun_times.append(time.perf_counter() - started)
+    print(json.dumps({
+        "first_run_ms": first_run_s * 1000, "rerun_ms": [seconds * 1000 for seconds in rerun_times],
+        "deferred_loaded": loaded, "exceptions": [str(e.value) for e in at.exception],
+    }))
+
+def parse_importtime(stderr):
+    # "import time: self [us] | cumulative | imported package" 형식에서 최상위(들여쓰기 없는) 항목만 모읍니다.
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):
+            modules[name.strip()] = int(cumulative) / 1000
+    return modules
+
+def main():
+    parser = argparse.ArgumentParser(description="JOJUN 앱 시작/재실행 시간 측정")
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--top", type=int, default=15, help="가져오기 시간이 긴 최상위 모듈 몇 개를 보여줄지")
+    parser.add_argument("--json")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return run_child(args.reruns)
+    # 측정 대상 프로세스의 가져오기 목록에 섞이지 않도록 부모 프로세스에서만 불러옵니다.
+    from run_benchmarks import percentile
+
+    # 실제 캐시/히스토리 DB를 건드리지 않도록 임시 디렉터리를 쓰고, API 키가 없어도 첫 화면까지 그려지도록 가짜 키를 넣습니다.
+    # 첫 화면에서는 AI를 호출하지 않으므로 가짜 키로도 측정 결과는 같습니다.
+    cache_dir = tempfile.mkdtemp(prefix="jojun-startup-")
+    env = dict(os.environ, JOJUN_CACHE_DIR=cache_dir, JOJUN_HISTORY_DB=os.path.join(cache_dir, "history.sqlite3"))
+    env.setdefault("GOOGLE_API_KEY", "startup-profile")
+    started = time.perf_counter()
+    process = subprocess.run([sys.executable, "-X", "importtime", os.path.abspath(__file__), "--child", "--reruns", str(args.reruns)],
+                             cwd=ROOT, env=env, capture_output=True, text=True)
+    process_s = time.perf_counter() - started
+    if process.returncode != 0:
+        sys.exit(f"측정 프로세스 실패:\n{process.stderr[-2000:]}")
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    modules = parse_importtime(process.stderr)
+    reruns = result["rerun_ms"]
+
+    print(f"{'module':<40}{'import(ms)':>12}")
+    for name, ms in sorted(modules.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{name:<40}{ms:>12.1f}")
+    print(f"\ntotal import time: {sum(modules.values()):.1f} ms ({len(modules)} top-level modules)")
+    print(f"first run: {result['first_run_ms']:.1f} ms · process wall time: {process_s * 1000:.0f} ms")
+    if reruns:
+        print(f"rerun: p50 {percentile(reruns, 0.5):.1f} ms · p95 {percentile(reruns, 0.95):.1f} ms ({len(reruns)} runs)")
+    print(f"deferred modules loaded on first screen: {', '.join(result['deferred_loaded']) or '-'}")
+    if result["exceptions"]:
+        print(f"app exceptions: {result['exceptions']}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({**result, "process_ms": process_s * 1000, "imports_ms": modules}, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
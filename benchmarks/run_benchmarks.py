@@ -0,0 +1,305 @@
+import argparse
+import functools
+import http.server
+import json
+import logging
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# 실제 캐시 디렉터리를 건드리지 않도록 모듈을 불러오기 전에 임시 캐시 경로를 지정합니다.
+os.environ.setdefault("JOJUN_CACHE_DIR", tempfile.mkdtemp(prefix="jojun-bench-"))
+
+import corpus
+from fake_client import FakeGeminiClient, LatencyModel
+
+# --- 오프라인 벤치마크 ---
+# 네트워크 없이 가짜 Gemini 클라이언트로 파일 추출, 텍스트 압축, 분석 오케스트레이션, 스트리밍, URL 본문 추출, 역량 색인 미리보기 경로를 측정합니다.
+# 사용법: python benchmarks/run_benchmarks.py [--runs 5] [--size medium] [--latency-scale 0.05] [--recording rec.json] [--json out.json]
+#         [--scenarios load --sessions 8 --failure-rate 0.2] [--scenarios preview --phrases 500]
+# 가짜 클라이언트의 지연 시간은 실제 응답 시간 분포에 --latency-scale을 곱한 값이므로, 절대값보다는 실행 간 비교에 사용하세요.
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * q
+    lower, upper = int(position), min(int(position) + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def summarize(name, latencies, peak_bytes, extra=None):
+    return {
+        "scenario": name,
+        "runs": len(latencies),
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "peak_mb": peak_bytes / (1024 * 1024),
+        **(extra or {}),
+    }
+
+def measure(fn, runs, setup=None):
+    # tracemalloc은 현재 프로세스의 파이썬 할당만 잽니다. PDF/PPTX 추출 작업 프로세스의 메모리는 포함되지 않습니다.
+    latencies, outputs, peak = [], [], 0
+    for _ in range(runs):
+        if setup:
+            setup()
+        tracemalloc.start()
+        started = time.perf_counter()
+        outputs.append(fn())
+        latencies.append(time.perf_counter() - started)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return latencies, outputs, peak
+
+def _stage_means(outputs):
+    stages = {}
+    for output in outputs:
+        for stage, seconds in output.get("stages", {}).items():
+            stages.setdefault(stage, []).append(seconds * 1000)
+    return {f"{stage}_ms": statistics.mean(values) for stage, values in stages.items()}
+
+def _reset_caches():
+    import ai_analyzer
+    from file_parser import clear_extraction_cache
+    clear_extraction_cache()
+    ai_analyzer.clear_ocr_cache()
+
+# --- 시나리오 ---
+def bench_ingestion(client, size, runs):
+    from file_parser import extract_files
+    files = corpus.make_file_set(size)
+
+    def run():
+        client.reset()
+        started = time.perf_counter()
+        # 파일 형식별로 시작부터 해당 파일의 추출이 끝날 때까지 걸린 시간을 기록합니다.
+        stages = {}
+        for index, file_name, text, error in extract_files(files):
+            if error:
+                raise RuntimeError(f"{file_name}: {error}")
+            stages[file_name.rsplit(".", 1)[-1]] = time.perf_counter() - started
+        return {"stages": stages, "calls": len(client.calls)}
+
+    # 첫 실행은 작업 프로세스를 띄우는 비용이 포함되므로 측정에서 제외합니다.
+    _reset_caches()
+    run()
+    cold = measure(run, runs, setup=_reset_caches)
+    warm = measure(run, runs)
+    total_bytes = sum(len(file_bytes) for _, file_bytes in files)
+    return [
+        summarize("ingestion_cold", cold[0], cold[2], {"files": len(files), "input_kb": total_bytes / 1024, "ocr_calls": statistics.mean(o["calls"] for o in cold[1]), **_stage_means(cold[1])}),
+        summarize("ingestion_warm", warm[0], warm[2], {"files": len(files), "ocr_calls": statistics.mean(o["calls"] for o in warm[1])}),
+    ]
+
+def bench_compaction(size, runs):
+    from text_compactor import compact_text, JD_TOKEN_BUDGET, EXPERIENCE_TOKEN_BUDGET
+    job_description = corpus.make_job_description(size) * 8
+    user_experience = corpus.make_experience(size) * 8
+
+    def run():
+        _, jd_stats = compact_text(job_description, JD_TOKEN_BUDGET, strip_boilerplate=True)
+        _, experience_stats = compact_text(user_experience, EXPERIENCE_TOKEN_BUDGET)
+        return {"saved_tokens": jd_stats["saved_tokens"] + experience_stats["saved_tokens"]}
+
+    latencies, outputs, peak = measure(run, runs)
+    return [summarize("compaction", latencies, peak, {"saved_tokens": outputs[0]["saved_tokens"]})]
+
+def bench_analysis(client, mode, size, runs):
+    import ai_analyzer
+    job_description, user_experience = corpus.make_job_description(size), corpus.make_experience(size)
+
+    def run():
+        client.reset()
+        result = ai_analyzer.run_full_analysis(job_description, user_experience, use_cache=False, mode=mode)
+        stages = {}
+        for call in client.calls:
+            stages[f"api_{call['kind']}"] = call["latency_s"]
+        return {"ok": bool(result and result.get("fit_score") is not None), "calls": len(client.calls),
+                "prompt_tokens": sum(call["prompt_tokens"] for call in client.calls), "stages": stages}
+
+    latencies, outputs, peak = measure(run, runs)
+    return [summarize(f"analysis_{mode}", latencies, peak, {
+        "calls_per_analysis": statistics.mean(o["calls"] for o in outputs),
+        "prompt_tokens": statistics.mean(o["prompt_tokens"] for o in outputs),
+        "failures": sum(1 for o in outputs if not o["ok"]),
+        **_stage_means(outputs),
+    })]
+
+def bench_streaming(client, size, runs):
+    import ai_analyzer
+    job_description, user_experience = corpus.make_job_description(size), corpus.make_experience(size)
+
+    def run():
+        client.reset()
+        started = time.perf_counter()
+        first_content = None
+        for key, value, finished in ai_analyzer.stream_full_analysis(job_description, user_experience, use_cache=False, mode="multi"):
+            if first_content is None and value:
+                first_content = time.perf_counter() - started
+        return {"calls": len(client.calls), "stages": {"first_content": first_content or 0.0}}
+
+    latencies, outputs, peak = measure(run, runs)
+    return [summarize("streaming_multi", latencies, peak, {
+        "calls_per_analysis": statistics.mean(o["calls"] for o in outputs),
+        **_stage_means(outputs),
+    })]
+
+def bench_load(size, sessions, failure_rate, latency_scale, seed):
+    # 여러 세션이 동시에 분석할 때(절반은 같은 입력) 일시적 오류(503)가 섞여도 결과를 받는지 원래 클라이언트와 비교합니다.
+    import ai_analyzer
+    from concurrent.futures import ThreadPoolExecutor
+    from gemini_client import RateLimitedClient
+    inputs = [(corpus.make_job_description(size, seed=0 if i % 2 else i), corpus.make_experience(size, seed=0 if i % 2 else i)) for i in range(sessions)]
+
+    def run_session(job_description, user_experience):
+        started = time.perf_counter()
+        result = ai_analyzer.run_full_analysis(job_description, user_experience, use_cache=False, mode="multi")
+        complete = bool(result) and "fit_score" in result and bool(result.get("suggestions")) and bool(result.get("interview_questions"))
+        return time.perf_counter() - started, complete
+
+    rows = []
+    for name in ("load_raw", "load_limited"):
+        fake = FakeGeminiClient(latency=LatencyModel(scale=latency_scale, seed=seed), failure_rate=failure_rate, seed=seed)
+        client = RateLimitedClient(fake, requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9, backoff_seconds=0.05) if name == "load_limited" else fake
+        ai_analyzer.set_gemini_client(client)
+        tracemalloc.start()
+        with ThreadPoolExecutor(max_workers=sessions) as executor:
+            outcomes = list(executor.map(lambda args: run_session(*args), inputs))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        extra = {"sessions": sessions, "complete_rate": sum(1 for _, complete in outcomes if complete) / sessions, "upstream_calls": len(fake.calls)}
+        if name == "load_limited":
+            stats = client.stats()
+            extra.update(coalesced=stats["coalesced"], retries=stats["retries"])
+        rows.append(summarize(name, [latency for latency, _ in outcomes], peak, extra))
+    return rows
+
+def bench_preview(size, runs, phrases):
+    # 역량 색인에 과거 분석 결과(역량 이름)를 채워 두고, LLM 호출 없이 미리보기 점수를 만드는 시간을 잽니다.
+    from competency_index import CompetencyIndex, HashingEmbedder
+    index = CompetencyIndex(db_path=os.path.join(tempfile.mkdtemp(prefix="jojun-bench-index-"), "index.sqlite3"))
+    entries = corpus.make_competency_phrases(phrases)
+    for start in range(0, len(entries), 5):
+        batch = entries[start:start + 5]
+        index.add([phrase for phrase, _ in batch], [score for _, score in batch])
+    embedder = HashingEmbedder()
+    postings = [(corpus.make_job_description(size, seed=i), corpus.make_experience(size, seed=i)) for i in range(runs)]
+
+    # 첫 호출은 색인 전체의 임베딩을 계산하므로 따로 잽니다.
+    started = time.perf_counter()
+    index.preview(*postings[0], embedder)
+    build_s = time.perf_counter() - started
+    remaining = iter(postings * 2)
+    latencies, outputs, peak = measure(lambda: index.preview(*next(remaining), embedder), runs)
+    # 분석이 끝날 때마다 역량이 몇 개씩 추가되므로, 추가 직후의 미리보기(새 역량만 임베딩)도 따로 잽니다.
+    index.add([f"{phrase} (신규)" for phrase, _ in entries[:5]], [score for _, score in entries[:5]])
+    started = time.perf_counter()
+    index.preview(*postings[0], embedder)
+    after_add_s = time.perf_counter() - started
+    return [summarize("preview_hashing", latencies, peak, {
+        "phrases": index.size(), "index_build_ms": build_s * 1000, "after_add_ms": after_add_s * 1000,
+        "candidates": statistics.mean(len(output["categories"]) if output else 0 for output in outputs),
+    })]
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+def bench_url_fetch(size, runs):
+    from url_fetcher import fetch_page_text
+    directory = tempfile.mkdtemp(prefix="jojun-bench-html-")
+    with open(os.path.join(directory, "job.html"), "w", encoding="utf-8") as f:
+        f.write(corpus.make_job_page_html(size))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/job.html"
+    try:
+        cold = measure(lambda: {"chars": len(fetch_page_text(url, use_cache=False))}, runs)
+        fetch_page_text(url)
+        cached = measure(lambda: {"chars": len(fetch_page_text(url))}, runs)
+    finally:
+        server.shutdown()
+    return [
+        summarize("url_fetch", cold[0], cold[2], {"chars": cold[1][0]["chars"]}),
+        summarize("url_fetch_cached", cached[0], cached[2], {"chars": cached[1][0]["chars"]}),
+    ]
+
+# --- 실행 ---
+def print_report(rows):
+    print(f"{'scenario':<18}{'runs':>5}{'p50(ms)':>10}{'p95(ms)':>10}{'peak(MB)':>10}  details")
+    for row in rows:
+        details = ", ".join(f"{key}={value:.1f}" if isinstance(value, float) else f"{key}={value}"
+                            for key, value in row.items() if key not in ("scenario", "runs", "p50_ms", "p95_ms", "peak_mb"))
+        print(f"{row['scenario']:<18}{row['runs']:>5}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['peak_mb']:>10.2f}  {details}")
+
+def main():
+    parser = argparse.ArgumentParser(description="JOJUN 오프라인 벤치마크 (가짜 Gemini 클라이언트 사용)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--size", choices=list(corpus.SIZES), default="medium", help="합성 공고/경험/파일 크기")
+    parser.add_argument("--latency-scale", type=float, default=0.05, help="가짜 API 지연 시간 배율 (1.0이면 실제 응답 시간 수준)")
+    parser.add_argument("--recording", help="RecordingClient로 저장한 응답 JSON (없으면 내장 응답 사용)")
+    parser.add_argument("--scenarios", nargs="+", default=["ingestion", "compaction", "analysis", "streaming", "url", "load", "preview"],
+                        choices=["ingestion", "compaction", "analysis", "streaming", "url", "load", "preview"])
+    parser.add_argument("--sessions", type=int, default=8, help="load 시나리오의 동시 세션 수")
+    parser.add_argument("--failure-rate", type=float, default=0.2, help="load 시나리오에서 가짜 API가 503을 돌려줄 확률")
+    parser.add_argument("--phrases", type=int, default=500, help="preview 시나리오의 역량 색인 크기")
+    parser.add_argument("--no-limiter", action="store_true", help="RateLimitedClient로 감싸지 않고 가짜 클라이언트를 그대로 사용")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="결과를 JSON으로 저장할 경로")
+    args = parser.parse_args()
+
+    # load 시나리오는 일부러 오류를 내므로 분석 함수의 오류 로그는 숨기고 결과 표만 출력합니다.
+    logging.basicConfig(level=logging.CRITICAL)
+    import ai_analyzer
+    # Streamlit 앱 밖에서 실행되므로 "missing ScriptRunContext" 경고를 숨깁니다.
+    # (Streamlit이 설정을 읽을 때 로그 레벨을 다시 정하므로 레벨 대신 로거 자체를 끕니다.)
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").disabled = True
+
+    latency = LatencyModel(scale=args.latency_scale, seed=args.seed)
+    if args.recording:
+        client = FakeGeminiClient.from_recording(args.recording, latency=latency, seed=args.seed)
+    else:
+        client = FakeGeminiClient(latency=latency, seed=args.seed)
+    if args.no_limiter:
+        ai_analyzer.set_gemini_client(client)
+    else:
+        # 앱과 같은 경로(요청 한도/재시도 래퍼)를 재되, 한도 자체로 느려지지 않도록 넉넉하게 설정합니다.
+        from gemini_client import RateLimitedClient
+        ai_analyzer.set_gemini_client(RateLimitedClient(client, requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9))
+
+    rows = []
+    if "ingestion" in args.scenarios:
+        rows += bench_ingestion(client, args.size, args.runs)
+    if "compaction" in args.scenarios:
+        rows += bench_compaction(args.size, args.runs)
+    if "analysis" in args.scenarios:
+        for mode in ai_analyzer.ANALYSIS_MODES:
+            rows += bench_analysis(client, mode, args.size, args.runs)
+    if "streaming" in args.scenarios:
+        rows += bench_streaming(client, args.size, args.runs)
+    if "url" in args.scenarios:
+        rows += bench_url_fetch(args.size, args.runs)
+    if "load" in args.scenarios:
+        rows += bench_load(args.size, args.sessions, args.failure_rate, args.latency_scale, args.seed)
+    if "preview" in args.scenarios:
+        rows += bench_preview(args.size, args.runs, args.phrases)
+
+    print_report(rows)
+    # ru_maxrss는 리눅스에서 KB, macOS에서 바이트 단위입니다.
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    max_rss_mb = max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024
+    print(f"\nprocess max RSS: {max_rss_mb:.1f} MB (size={args.size}, latency-scale={args.latency_scale})")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"size": args.size, "latency_scale": args.latency_scale, "max_rss_mb": max_rss_mb, "results": rows}, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
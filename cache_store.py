@@ -0,0 +1,173 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+# --- 캐시 저장 위치 ---
+# Streamlit 세션과 프로세스 사이에서 공유되도록 로컬 디스크(SQLite)에 저장합니다.
+CACHE_DIR = os.environ.get("JOJUN_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".jojun_cache"))
+CACHE_DB_PATH = os.path.join(CACHE_DIR, "cache.sqlite3")
+
+# --- 캐시 키 유틸리티 ---
+def normalize_text(text):
+    # 공백/줄바꿈 차이만 있는 동일한 입력이 같은 키를 갖도록 정규화합니다.
+    text = unicodedata.normalize("NFC", text or "")
+    return re.sub(r"\s+", " ", text).strip()
+
+def make_cache_key(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+# --- 프로세스 메모리 캐시 (용량 제한 LRU) ---
+class MemoryLRU:
+    def __init__(self, max_bytes, sizeof=len):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key][0]
+
+    def set(self, key, value):
+        size = self.sizeof(value)
+        with self._lock:
+            if key in self._data:
+                self._size -= self._data.pop(key)[1]
+            if size > self.max_bytes:
+                return
+            self._data[key] = (value, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted_size) = self._data.popitem(last=False)
+                self._size -= evicted_size
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._data:
+                self._size -= self._data.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0, "entries": len(self._data), "bytes": self._size}
+
+# --- SQLite 기반 영구 캐시 ---
+class PersistentCache:
+    def __init__(self, namespace, ttl_seconds=7 * 24 * 3600, max_bytes=64 * 1024 * 1024, db_path=CACHE_DB_PATH):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.db_path = db_path
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,
+                size INTEGER NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key))""")
+            conn.execute("""CREATE TABLE IF NOT EXISTS cache_stats (
+                namespace TEXT PRIMARY KEY, hits INTEGER NOT NULL DEFAULT 0, misses INTEGER NOT NULL DEFAULT 0)""")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, conn, column):
+        conn.execute("INSERT OR IGNORE INTO cache_stats (namespace) VALUES (?)", (self.namespace,))
+        conn.execute(f"UPDATE cache_stats SET {column} = {column} + 1 WHERE namespace = ?", (self.namespace,))
+
+    def get(self, key):
+        try:
+            conn = self._connect()
+            row = conn.execute("SELECT value, created_at FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key)).fetchone()
+            now = time.time()
+            if row is None or (self.ttl_seconds and now - row[1] > self.ttl_seconds):
+                if row is not None:
+                    conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key))
+                self._count(conn, "misses")
+                return None
+            conn.execute("UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?", (now, self.namespace, key))
+            self._count(conn, "hits")
+            return json.loads(row[0])
+        except (sqlite3.Error, ValueError) as e:
+            logging.warning(f"캐시 조회 실패 ({self.namespace}): {e}")
+            return None
+
+    def set(self, key, value):
+        try:
+            payload = json.dumps(value, ensure_ascii=False)
+            now = time.time()
+            conn = self._connect()
+            conn.execute("INSERT OR REPLACE INTO cache_entries (namespace, key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                         (self.namespace, key, payload, len(payload.encode("utf-8")), now, now))
+            self._evict(conn, now)
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logging.warning(f"캐시 저장 실패 ({self.namespace}): {e}")
+
+    def _evict(self, conn, now):
+        # 만료된 항목을 먼저 지우고, 용량을 넘으면 가장 오래 사용되지 않은 항목부터 제거합니다(LRU).
+        if self.ttl_seconds:
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND created_at < ?", (self.namespace, now - self.ttl_seconds))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?", (self.namespace,)).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute("SELECT key, size FROM cache_entries WHERE namespace = ? ORDER BY accessed_at ASC", (self.namespace,)).fetchall()
+        stale_keys = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale_keys.append((self.namespace, key))
+            total -= size
+        conn.executemany("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", stale_keys)
+
+    def delete(self, key):
+        try:
+            self._connect().execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key))
+        except sqlite3.Error as e:
+            logging.warning(f"캐시 삭제 실패 ({self.namespace}): {e}")
+
+    def clear(self):
+        try:
+            conn = self._connect()
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+            conn.execute("DELETE FROM cache_stats WHERE namespace = ?", (self.namespace,))
+        except sqlite3.Error as e:
+            logging.warning(f"캐시 초기화 실패 ({self.namespace}): {e}")
+
+    def stats(self):
+        try:
+            conn = self._connect()
+            hits, misses = conn.execute("SELECT hits, misses FROM cache_stats WHERE namespace = ?", (self.namespace,)).fetchone() or (0, 0)
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?", (self.namespace,)).fetchone()
+        except sqlite3.Error as e:
+            logging.warning(f"캐시 통계 조회 실패 ({self.namespace}): {e}")
+            hits, misses, entries, size = 0, 0, 0, 0
+        lookups = hits + misses
+        return {"hits": hits, "misses": misses, "hit_rate": hits / lookups if lookups else 0.0, "entries": entries, "bytes": size}
@@ -0,0 +1,224 @@
+import base64
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+import numpy as np
+from cache_store import CACHE_DIR, PersistentCache, make_cache_key, normalize_text
+import telemetry
+
+# --- 설정 ---
+COMPETENCY_INDEX_PATH = os.environ.get("JOJUN_COMPETENCY_INDEX_DB", os.path.join(CACHE_DIR, "competency_index.sqlite3"))
+COMPETENCY_INDEX_MAX_PHRASES = int(os.environ.get("JOJUN_COMPETENCY_INDEX_MAX_PHRASES", 5000))
+EMBEDDING_MODEL = os.environ.get("JOJUN_EMBEDDING_MODEL", "gemini-embedding-001")
+EMBEDDING_DIMENSIONS = int(os.environ.get("JOJUN_EMBEDDING_DIMENSIONS", 768))
+HASHING_DIMENSIONS = 1024
+# 공고/경험은 줄(문장) 단위 조각으로 나누어 비교하며, 너무 짧은 줄은 버리고 너무 많으면 앞쪽만 씁니다.
+MIN_SNIPPET_LENGTH = 4
+MAX_SNIPPETS = 200
+
+def split_snippets(text):
+    snippets, seen = [], set()
+    for line in re.split(r"[\n•·▪■◦]|(?<=[.!?。])\s+", text or ""):
+        line = normalize_text(re.sub(r"^[\s\-*#>\d.)]+", "", line))
+        if len(line) >= MIN_SNIPPET_LENGTH and line.lower() not in seen:
+            seen.add(line.lower())
+            snippets.append(line)
+            if len(snippets) >= MAX_SNIPPETS:
+                break
+    return snippets
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+# --- 임베딩 ---
+# similarity_range는 "관련 없음"과 "거의 같은 뜻"에 해당하는 대략적인 코사인 유사도로, 유사도를 0~100점으로 바꿀 때 씁니다.
+class HashingEmbedder:
+    # 단어와 글자 3-gram을 해시해 고정 길이 벡터로 만듭니다. 네트워크 없이 수 밀리초 안에 끝나므로 미리보기에 씁니다.
+    # 표기가 비슷한 표현("데이터베이스 설계"/"DB 설계 경험")은 잡아내지만 뜻만 같은 표현은 잘 구분하지 못합니다.
+    name = "hashing-v1"
+    similarity_range = (0.1, 0.5)
+
+    def __init__(self, dimensions=HASHING_DIMENSIONS):
+        self.dimensions = dimensions
+
+    def _features(self, text):
+        features = []
+        for word in re.findall(r"[\w+#]+", text.lower()):
+            features.append(word)
+            padded = f" {word} "
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        return features
+
+    def embed(self, texts):
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            hashes = np.fromiter((zlib.crc32(feature.encode("utf-8")) for feature in self._features(text)), dtype=np.int64)
+            signs = np.where(hashes & 0x80000000, 1.0, -1.0).astype(np.float32)
+            np.add.at(matrix[row], hashes % self.dimensions, signs)
+        return _normalize_rows(matrix)
+
+class GeminiEmbedder:
+    # 한 번 계산한 임베딩은 디스크 캐시에 저장하므로 같은 역량/경험 문장은 다시 요청하지 않습니다.
+    similarity_range = (0.55, 0.85)
+
+    def __init__(self, get_client, model=EMBEDDING_MODEL, dimensions=EMBEDDING_DIMENSIONS, batch_size=100):
+        self.get_client = get_client
+        self.model = model
+        self.dimensions = dimensions
+        self.batch_size = batch_size
+        self.name = f"gemini:{model}:{dimensions}"
+        self._cache = PersistentCache("embedding", ttl_seconds=90 * 24 * 3600, max_bytes=64 * 1024 * 1024)
+
+    def embed(self, texts):
+        keys = [make_cache_key(self.name, text) for text in texts]
+        vectors = [self._cache.get(key) for key in keys]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        with telemetry.span("embedding", model=self.model, texts=len(texts), cache_hit=not missing) as span:
+            for start in range(0, len(missing), self.batch_size):
+                batch = missing[start:start + self.batch_size]
+                response = self.get_client().models.embed_content(
+                    model=self.model,
+                    contents=[texts[i] for i in batch],
+                    config={"task_type": "SEMANTIC_SIMILARITY", "output_dimensionality": self.dimensions},
+                )
+                for i, embedding in zip(batch, response.embeddings):
+                    vectors[i] = base64.b64encode(np.asarray(embedding.values, dtype=np.float32).tobytes()).decode("ascii")
+                    self._cache.set(keys[i], vectors[i])
+            span["embedded"] = len(missing)
+        if not texts:
+            return np.zeros((0, self.dimensions), dtype=np.float32)
+        return _normalize_rows(np.vstack([np.frombuffer(base64.b64decode(vector), dtype=np.float32) for vector in vectors]))
+
+# --- 역량 색인 ---
+# 지난 분석에서 나온 역량 이름(categories)과 요구 수준(job_scores)을 모아 두고,
+# 새 공고와 비슷한 역량을 코사인 유사도로 찾아 LLM 호출 없이 예상 역량과 점수를 계산합니다.
+class CompetencyIndex:
+    def __init__(self, db_path=COMPETENCY_INDEX_PATH, max_phrases=COMPETENCY_INDEX_MAX_PHRASES):
+        self.db_path = db_path
+        self.max_phrases = max_phrases
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._version = 0
+        # 임베딩 방식별로 (색인 버전, 역량 목록, 평균 요구 점수, 정규화된 벡터 행렬)을 보관합니다.
+        self._matrices = {}
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS competencies (
+                phrase TEXT PRIMARY KEY, occurrences INTEGER NOT NULL, job_score_sum REAL NOT NULL, updated_at REAL NOT NULL)""")
+            self._local.conn = conn
+        return conn
+
+    def add(self, categories, job_scores):
+        rows = [(normalize_text(phrase), float(score), time.time()) for phrase, score in zip(categories or [], job_scores or []) if normalize_text(phrase)]
+        if not rows:
+            return
+        try:
+            conn = self._connect()
+            conn.executemany("""INSERT INTO competencies (phrase, occurrences, job_score_sum, updated_at) VALUES (?, 1, ?, ?)
+                                ON CONFLICT (phrase) DO UPDATE SET occurrences = occurrences + 1,
+                                job_score_sum = job_score_sum + excluded.job_score_sum, updated_at = excluded.updated_at""", rows)
+            if self.max_phrases:
+                # 한 번만 나온 오래된 역량부터 지웁니다.
+                conn.execute("""DELETE FROM competencies WHERE phrase NOT IN (
+                                SELECT phrase FROM competencies ORDER BY occurrences DESC, updated_at DESC LIMIT ?)""", (self.max_phrases,))
+        except sqlite3.Error as e:
+            logging.warning(f"역량 색인 저장 실패: {e}")
+            return
+        with self._lock:
+            self._version += 1
+
+    def size(self):
+        try:
+            return self._connect().execute("SELECT COUNT(*) FROM competencies").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def _load(self, embedder):
+        with self._lock:
+            version = self._version
+            cached = self._matrices.get(embedder.name)
+        if cached and cached[0] == version:
+            return cached[1:]
+        try:
+            rows = self._connect().execute("SELECT phrase, job_score_sum / occurrences FROM competencies ORDER BY phrase").fetchall()
+        except sqlite3.Error as e:
+            logging.warning(f"역량 색인 조회 실패: {e}")
+            rows = []
+        phrases = [row[0] for row in rows]
+        job_scores = np.array([row[1] for row in rows], dtype=np.float32)
+        # 분석 한 번에 새로 생기는 역량은 몇 개뿐이므로, 이미 계산한 벡터는 재사용하고 새 역량만 임베딩해 행렬에 채워 넣습니다.
+        known = {phrase: row for row, phrase in enumerate(cached[1])} if cached else {}
+        new_rows = [row for row, phrase in enumerate(phrases) if phrase not in known]
+        new_matrix = embedder.embed([phrases[row] for row in new_rows]) if new_rows or not cached else None
+        dimensions = new_matrix.shape[1] if new_matrix is not None else cached[3].shape[1]
+        matrix = np.empty((len(phrases), dimensions), dtype=np.float32)
+        if new_rows:
+            matrix[new_rows] = new_matrix
+        old_rows = [row for row, phrase in enumerate(phrases) if phrase in known]
+        if old_rows:
+            matrix[old_rows] = cached[3][[known[phrases[row]] for row in old_rows]]
+        with self._lock:
+            self._matrices[embedder.name] = (version, phrases, job_scores, matrix)
+        return phrases, job_scores, matrix
+
+    def match(self, text, embedder, top_k=5, min_similarity=None):
+        # 공고의 각 줄과 가장 비슷한 정도를 역량별 관련도로 보고, 서로 거의 같은 역량은 하나만 남깁니다.
+        phrases, job_scores, matrix = self._load(embedder)
+        snippets = split_snippets(text)
+        if not phrases or not snippets:
+            return []
+        min_similarity = embedder.similarity_range[0] if min_similarity is None else min_similarity
+        snippet_matrix = embedder.embed(snippets)
+        similarities = snippet_matrix @ matrix.T
+        relevance = similarities.max(axis=0)
+        evidence = similarities.argmax(axis=0)
+        matches, chosen = [], []
+        for index in np.argsort(-relevance):
+            if relevance[index] < min_similarity or len(matches) >= top_k:
+                break
+            if any(float(matrix[index] @ matrix[other]) > 0.9 for other in chosen):
+                continue
+            chosen.append(index)
+            matches.append({"competency": phrases[index], "similarity": float(relevance[index]), "job_score": float(job_scores[index]),
+                            "evidence": snippets[evidence[index]], "vector": matrix[index], "evidence_vector": snippet_matrix[evidence[index]]})
+        return matches
+
+    def preview(self, job_description, user_experience, embedder, top_k=5):
+        # 요구 점수는 같은 역량이 과거 분석에서 받은 평균 점수이고, 보유 점수는 역량 이름 또는 그 역량을 요구한 공고 문장과
+        # 가장 비슷한 경험 문장의 유사도를 0~100점으로 바꾼 값입니다.
+        with telemetry.span("competency.preview", embedder=embedder.name) as span:
+            matches = self.match(job_description, embedder, top_k)
+            experience_snippets = split_snippets(user_experience)
+            span["candidates"] = len(matches)
+            if not matches or not experience_snippets:
+                return None
+            experience_matrix = embedder.embed(experience_snippets)
+            coverage = np.maximum(experience_matrix @ np.vstack([match["vector"] for match in matches]).T,
+                                  experience_matrix @ np.vstack([match["evidence_vector"] for match in matches]).T)
+            low, high = embedder.similarity_range
+            user_scores = np.clip((coverage.max(axis=0) - low) / (high - low), 0, 1) * 100
+            job_scores = [round(match["job_score"]) for match in matches]
+            covered = sum(min(user, job) for user, job in zip(user_scores, job_scores))
+            return {
+                "categories": [match["competency"] for match in matches],
+                "job_scores": job_scores,
+                "user_scores": [int(round(score)) for score in user_scores],
+                "fit_score": int(round(covered / max(1, sum(job_scores)) * 100)),
+                "overall_comment": "과거 분석에서 모은 역량과의 유사도로 계산한 미리보기 점수입니다. 정확한 결과는 AI 분석으로 확인하세요.",
+                "mode": "preview",
+                "matches": [{
+                    "competency": match["competency"], "similarity": round(match["similarity"], 3), "evidence": match["evidence"],
+                    "experience": experience_snippets[int(coverage[:, i].argmax())],
+                } for i, match in enumerate(matches)],
+            }
@@ -0,0 +1,298 @@
+import io
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from cache_store import MemoryLRU, make_cache_key
+from image_utils import content_hash
+import telemetry
+
+# --- 병렬 처리 설정 ---
+FILE_TIMEOUT_SECONDS = float(os.environ.get("JOJUN_FILE_TIMEOUT", 60))
+CPU_WORKERS = int(os.environ.get("JOJUN_CPU_WORKERS", min(4, os.cpu_count() or 1)))
+OCR_WORKERS = int(os.environ.get("JOJUN_OCR_WORKERS", 4))
+EXTRACTION_CACHE_MAX_MB = int(os.environ.get("JOJUN_EXTRACTION_CACHE_MAX_MB", 64))
+
+# --- PDF 추출 한도 ---
+# 아주 긴 포트폴리오 PDF도 앞부분만 읽어 CPU 시간과 프롬프트 토큰을 아낍니다. 0이면 제한하지 않습니다.
+PDF_MAX_PAGES = int(os.environ.get("JOJUN_PDF_MAX_PAGES", 50))
+PDF_MAX_CHARS = int(os.environ.get("JOJUN_PDF_MAX_CHARS", 100_000))
+
+# --- PDF 페이지 단위 추출 ---
+def _has_fonts(resources):
+    resources = resources.get_object() if resources is not None else None
+    if not resources:
+        return False
+    if resources.get("/Font"):
+        return True
+    # 폼 XObject 안에 글자가 들어 있는 경우도 있으므로 한 단계 더 확인합니다.
+    xobjects = resources.get("/XObject")
+    for xobject in (xobjects.get_object().values() if xobjects else []):
+        xobject = xobject.get_object()
+        if xobject.get("/Subtype") == "/Form" and xobject.get("/Resources") and xobject["/Resources"].get_object().get("/Font"):
+            return True
+    return False
+
+def _page_has_text(page):
+    # 내용이 없거나 폰트 리소스가 없는(스캔 이미지뿐인) 페이지는 extract_text를 호출하지 않고 건너뜁니다.
+    return page.get("/Contents") is not None and _has_fonts(page.get("/Resources"))
+
+def iter_pdf_pages(file_bytes, max_pages=PDF_MAX_PAGES):
+    import PyPDF2
+    for number, page in enumerate(PyPDF2.PdfReader(io.BytesIO(file_bytes)).pages):
+        if max_pages and number >= max_pages:
+            logging.info(f"PDF 페이지 한도({max_pages}쪽)에 도달하여 나머지 페이지를 건너뜁니다.")
+            break
+        if not _page_has_text(page):
+            continue
+        text = page.extract_text()
+        if text and text.strip():
+            yield number, text
+
+def extract_pdf_text(file_bytes, max_pages=PDF_MAX_PAGES, max_chars=PDF_MAX_CHARS):
+    parts, total = [], 0
+    for _, text in iter_pdf_pages(file_bytes, max_pages):
+        if max_chars and total + len(text) > max_chars:
+            if max_chars > total:
+                parts.append(text[:max_chars - total])
+            logging.info(f"PDF 글자 수 한도({max_chars}자)에 도달하여 추출을 중단합니다.")
+            break
+        parts.append(text)
+        total += len(text) + 1
+    return "\n".join(parts)
+
+# --- 파일 형식별 추출 함수 ---
+# PDF/PPTX 추출은 CPU 작업이므로 프로세스 풀에서, 이미지 OCR은 네트워크 대기이므로 스레드 풀에서 실행합니다.
+# 형식별 라이브러리는 해당 형식의 파일을 처음 처리할 때 가져오므로, 앱 시작과 작업 프로세스 생성이 가벼워집니다.
+def _handle_pdf(file_bytes): return extract_pdf_text(file_bytes)
+def _handle_pptx(file_bytes):
+    from pptx import Presentation
+    text = []
+    for slide in Presentation(io.BytesIO(file_bytes)).slides:
+        for shape in slide.shapes:
+            if hasattr(shape, "text"): text.append(shape.text)
+    return "\n".join(text)
+def _handle_image(file_bytes):
+    # 프로세스 풀 작업자가 Streamlit/Gemini SDK까지 불러오지 않도록 OCR 모듈은 여기서 가져옵니다.
+    from ai_analyzer import ocr_with_gemini
+    text = ocr_with_gemini(file_bytes)
+    if text is None: raise RuntimeError("이미지에서 텍스트를 추출하지 못했습니다.")
+    return text
+def _handle_text(file_bytes): return file_bytes.decode("utf-8", errors='ignore')
+
+# 추출 방식이 바뀌면 해당 형식의 버전을 올려서 이전에 캐시된 결과가 재사용되지 않도록 합니다.
+FILE_HANDLERS = {
+    'pdf': ('cpu', _handle_pdf, 2), 'pptx': ('cpu', _handle_pptx, 1),
+    'jpg': ('ocr', _handle_image, 1), 'jpeg': ('ocr', _handle_image, 1), 'png': ('ocr', _handle_image, 1),
+    'txt': ('inline', _handle_text, 1), 'md': ('inline', _handle_text, 1),
+}
+
+def get_file_handler(file_name):
+    ext = file_name.split('.')[-1].lower()
+    return FILE_HANDLERS.get(ext, ('inline', _handle_text, 1))
+
+# --- 파일별 추출 결과 캐시 ---
+# Streamlit은 버튼을 누를 때마다 스크립트를 다시 실행하므로, 내용이 바뀌지 않은 파일은 이전 추출 결과를 재사용합니다.
+_extraction_cache = MemoryLRU(EXTRACTION_CACHE_MAX_MB * 1024 * 1024, sizeof=lambda text: len(text.encode("utf-8")))
+
+def _extraction_cache_key(handler, version, file_bytes):
+    return make_cache_key(handler.__name__, version, content_hash(file_bytes))
+
+def invalidate_extraction(file_name, file_bytes):
+    _, handler, version = get_file_handler(file_name)
+    _extraction_cache.delete(_extraction_cache_key(handler, version, file_bytes))
+
+def clear_extraction_cache():
+    _extraction_cache.clear()
+
+def get_extraction_cache_stats():
+    return _extraction_cache.stats()
+
+# --- 작업 풀 ---
+# 이미지 OCR 스레드 풀은 모든 세션이 함께 쓰고, PDF/PPTX 프로세스 풀은 extract_files 호출 하나가 빌려 혼자 씁니다.
+# 시간 초과된 CPU 작업은 작업 프로세스를 종료해야만 멈출 수 있으므로, 풀을 나눠 쓰면 다른 세션의 파일까지 함께 실패하기 때문입니다.
+# 다 쓴 풀은 하나만 남겨 두었다가 다음 호출에 빌려주어, 매번 작업 프로세스를 새로 띄우지 않습니다.
+_pool_lock = threading.Lock()
+_ocr_pool = None
+_idle_process_pool = None
+# 시간 초과로 포기했지만 아직 스레드를 차지하고 있는 OCR 작업입니다. 끝날 때까지 풀의 빈 자리에서 뺍니다.
+_abandoned_ocr = set()
+# 아직 시작하지 못한 OCR 작업이 있을 때, 시작 여부를 확인하는 간격(초)입니다.
+QUEUE_POLL_SECONDS = 0.5
+
+def _borrow_process_pool():
+    global _idle_process_pool
+    with _pool_lock:
+        pool, _idle_process_pool = _idle_process_pool, None
+    # 쉬는 동안 작업 프로세스가 비정상 종료된 풀은 버리고 새로 만듭니다.
+    if pool is not None and not getattr(pool, "_broken", False):
+        return pool
+    # Streamlit 서버는 다중 스레드이므로 fork 대신 spawn으로 작업 프로세스를 만듭니다.
+    return ProcessPoolExecutor(max_workers=CPU_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+def _return_process_pool(pool):
+    global _idle_process_pool
+    with _pool_lock:
+        if _idle_process_pool is None:
+            _idle_process_pool = pool
+            return
+    pool.shutdown(wait=False)
+
+def _terminate_process_pool(pool):
+    # 실행 중인 작업은 취소할 수 없으므로 작업 프로세스를 종료합니다.
+    for process in list((getattr(pool, "_processes", None) or {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _get_ocr_pool():
+    global _ocr_pool
+    with _pool_lock:
+        if _ocr_pool is None:
+            _ocr_pool = ThreadPoolExecutor(max_workers=OCR_WORKERS, thread_name_prefix="jojun-ocr")
+        return _ocr_pool
+
+def _release_ocr(future):
+    with _pool_lock:
+        _abandoned_ocr.discard(future)
+
+def _abandon_ocr(future):
+    with _pool_lock:
+        _abandoned_ocr.add(future)
+    future.add_done_callback(_release_ocr)
+
+def _free_ocr_slots():
+    # 멈춘 스레드가 자리를 모두 차지해도 한 개씩은 제출합니다. 시작할 때부터 제한 시간을 재므로 대기 중에 시간 초과되지 않습니다.
+    with _pool_lock:
+        return max(1, OCR_WORKERS - len(_abandoned_ocr))
+
+def _mark_started(fn, clock):
+    def run(*args):
+        clock["started"] = time.monotonic()
+        return fn(*args)
+    return run
+
+# --- 파일 추출 파이프라인 ---
+def _record_extraction(handler, file_bytes, started_at, text=None, error=None, cache_hit=False):
+    # 작업 프로세스 안에서는 트레이스에 기록할 수 없으므로, 제출부터 결과 수신까지의 시간을 여기서 기록합니다.
+    attrs = {"input_bytes": len(file_bytes), "cache_hit": cache_hit}
+    if text is not None:
+        attrs["output_chars"] = len(text)
+    if error is not None:
+        attrs["error"] = type(error).__name__
+    telemetry.record_span(f"extract.{handler.__name__.removeprefix('_handle_')}", (time.monotonic() - started_at) * 1000, **attrs)
+
+def extract_files(files, timeout=FILE_TIMEOUT_SECONDS):
+    # files: [(파일 이름, 바이트)] 목록. 처리가 끝나는 순서대로 (입력 순번, 파일 이름, 텍스트, 오류)를 돌려줍니다.
+    backlog = {'cpu': [], 'ocr': []}
+    for index, (file_name, file_bytes) in enumerate(files):
+        kind, handler, version = get_file_handler(file_name)
+        started_at = time.monotonic()
+        if kind == 'inline':
+            try: text = handler(file_bytes)
+            except Exception as e:
+                _record_extraction(handler, file_bytes, started_at, error=e)
+                yield index, file_name, None, e
+                continue
+            _record_extraction(handler, file_bytes, started_at, text)
+            yield index, file_name, text, None
+            continue
+        cache_key = _extraction_cache_key(handler, version, file_bytes)
+        cached_text = _extraction_cache.get(cache_key)
+        if cached_text is not None:
+            _record_extraction(handler, file_bytes, started_at, cached_text, cache_hit=True)
+            yield index, file_name, cached_text, None
+            continue
+        backlog[kind].append((index, file_name, handler, file_bytes, cache_key))
+
+    process_pool = None
+    # 작업 프로세스가 비정상 종료되어 새 풀에서 한 번 더 처리한 파일의 순번입니다.
+    retried = set()
+    # pending: {future: (작업, 종류, 작업을 제출한 프로세스 풀, 시각)}. 시각의 "started"는 작업이 실제로 시작된 때입니다.
+    pending = {}
+    try:
+        while pending or any(backlog.values()):
+            # CPU 작업은 풀의 작업자 수만큼만 제출하므로 제출 시점이 곧 시작 시점입니다.
+            # OCR 스레드 풀은 다른 세션과 함께 쓰므로 대기열에서 기다릴 수 있어, 작업이 시작될 때부터 제한 시간을 잽니다.
+            for kind, queue in backlog.items():
+                limit = CPU_WORKERS if kind == 'cpu' else _free_ocr_slots()
+                while queue and sum(1 for entry in pending.values() if entry[1] == kind) < limit:
+                    task = queue.pop(0)
+                    now = time.monotonic()
+                    if kind == 'cpu':
+                        if process_pool is None:
+                            process_pool = _borrow_process_pool()
+                        clock = {"submitted": now, "started": now}
+                        future = process_pool.submit(task[2], task[3])
+                    else:
+                        from ai_analyzer import with_script_ctx
+                        clock = {"submitted": now, "started": None}
+                        future = _get_ocr_pool().submit(_mark_started(with_script_ctx(task[2]), clock), task[3])
+                    pending[future] = (task, kind, process_pool if kind == 'cpu' else None, clock)
+
+            now = time.monotonic()
+            running = [clock["started"] for _, _, _, clock in pending.values() if clock["started"] is not None]
+            wait_seconds = max(0.0, min(running) + timeout - now) if running else None
+            if len(running) < len(pending):
+                wait_seconds = min(wait_seconds, QUEUE_POLL_SECONDS) if wait_seconds is not None else QUEUE_POLL_SECONDS
+            done, _ = wait(pending, timeout=wait_seconds, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                task, kind, pool, clock = pending.pop(future)
+                index, file_name = task[0], task[1]
+                try:
+                    text = future.result()
+                except BrokenProcessPool as e:
+                    # 작업 프로세스가 비정상 종료되면 같은 풀의 작업이 모두 실패하므로, 새 풀에서 한 번 더 처리합니다.
+                    if pool is process_pool:
+                        _terminate_process_pool(process_pool)
+                        process_pool = None
+                    if index not in retried:
+                        retried.add(index)
+                        backlog['cpu'].insert(0, task)
+                        continue
+                    _record_extraction(task[2], task[3], clock["submitted"], error=e)
+                    yield index, file_name, None, e
+                    continue
+                except Exception as e:
+                    _record_extraction(task[2], task[3], clock["submitted"], error=e)
+                    yield index, file_name, None, e
+                    continue
+                _extraction_cache.set(task[4], text)
+                _record_extraction(task[2], task[3], clock["submitted"], text)
+                yield index, file_name, text, None
+
+            now = time.monotonic()
+            for future, (task, kind, pool, clock) in list(pending.items()):
+                if future not in pending or clock["started"] is None or now - clock["started"] < timeout:
+                    continue
+                del pending[future]
+                index, file_name = task[0], task[1]
+                logging.warning(f"'{file_name}' 처리 시간이 {timeout:.0f}초를 넘어 건너뜁니다.")
+                error = TimeoutError(f"처리 시간 초과 ({timeout:.0f}초)")
+                _record_extraction(task[2], task[3], clock["submitted"], error=error)
+                yield index, file_name, None, error
+                if kind == 'ocr':
+                    _abandon_ocr(future)
+                    continue
+                # 멈춘 작업 프로세스를 정리하고, 함께 실행 중이던 다른 파일은 새 풀에서 다시 처리합니다.
+                # 이 풀은 이 호출만 쓰므로 다른 세션의 작업에는 영향이 없습니다.
+                if pool is process_pool:
+                    _terminate_process_pool(process_pool)
+                    process_pool = None
+                for other, (other_task, other_kind, other_pool, _) in list(pending.items()):
+                    if other_kind == 'cpu' and other_pool is pool:
+                        del pending[other]
+                        backlog['cpu'].insert(0, other_task)
+    finally:
+        # 중간에 멈춘 경우(사용자가 다시 실행 등) 남은 OCR 대기 작업을 취소하고 작업 프로세스를 정리합니다.
+        for future, (_, kind, _, _) in pending.items():
+            if kind == 'ocr' and not future.cancel():
+                _abandon_ocr(future)
+        if process_pool is not None:
+            if any(kind == 'cpu' for _, kind, _, _ in pending.values()):
+                _terminate_process_pool(process_pool)
+            else:
+                _return_process_pool(process_pool)
@@ -0,0 +1,164 @@
+import json
+import logging
+import os
+import threading
+import time
+from cache_store import make_cache_key
+from rate_limit import TokenBucket, backoff_delay, is_retryable_error
+from text_compactor import estimate_tokens
+import telemetry
+
+# --- 설정 ---
+# 여러 Streamlit 세션이 하나의 클라이언트(st.cache_resource)를 공유하므로 아래 한도는 프로세스 전체에 적용됩니다.
+GEMINI_REQUESTS_PER_MINUTE = int(os.environ.get("JOJUN_GEMINI_RPM", 60))
+GEMINI_TOKENS_PER_MINUTE = int(os.environ.get("JOJUN_GEMINI_TPM", 250_000))
+GEMINI_MAX_CONCURRENCY = int(os.environ.get("JOJUN_GEMINI_MAX_CONCURRENCY", 8))
+GEMINI_MAX_RETRIES = int(os.environ.get("JOJUN_GEMINI_MAX_RETRIES", 3))
+# 요청 한도 때문에 이보다 오래 기다려야 하면 기다리지 않고 바로 실패시킵니다.
+GEMINI_QUEUE_TIMEOUT = float(os.environ.get("JOJUN_GEMINI_QUEUE_TIMEOUT", 120))
+# 이미지 한 장은 입력 토큰 약 258개로 계산됩니다.
+IMAGE_TOKENS = 258
+
+class RateLimitTimeout(RuntimeError):
+    # 429와 같은 코드를 달아 두어 배치 분석 등 바깥쪽 재시도 로직이 일시적 오류로 다루게 합니다.
+    code = 429
+
+def estimate_request_tokens(contents):
+    parts = contents if isinstance(contents, list) else [contents]
+    return sum(estimate_tokens(part) if isinstance(part, str) else IMAGE_TOKENS for part in parts)
+
+def _request_key(model, contents, config):
+    # 텍스트로만 된 요청만 합칩니다. 이미지 요청은 OCR 캐시가 이미 중복을 걸러냅니다.
+    if not isinstance(contents, str):
+        return None
+    return make_cache_key(model, json.dumps(config, sort_keys=True, ensure_ascii=False, default=str), contents)
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+# --- 요청 한도 / 재시도 / 중복 요청 합치기를 적용한 클라이언트 ---
+# 앱은 동기식(스레드) 구조이므로 asyncio 대신 스레드 락과 세마포어로 구현합니다.
+# genai.Client와 같은 모양(client.models.generate_content / generate_content_stream / embed_content)을 유지하므로 호출하는 쪽은 바꿀 필요가 없습니다.
+class RateLimitedClient:
+    def __init__(self, client, requests_per_minute=GEMINI_REQUESTS_PER_MINUTE, tokens_per_minute=GEMINI_TOKENS_PER_MINUTE,
+                 max_concurrency=GEMINI_MAX_CONCURRENCY, max_retries=GEMINI_MAX_RETRIES, queue_timeout=GEMINI_QUEUE_TIMEOUT, backoff_seconds=2.0):
+        self._client = client
+        self.models = self
+        self.max_retries = max_retries
+        self.queue_timeout = queue_timeout
+        self.backoff_seconds = backoff_seconds
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "coalesced": 0, "retries": 0, "rate_limited": 0}
+
+    def __getattr__(self, name):
+        # files, chats 등 감싸지 않은 기능은 원래 클라이언트로 넘깁니다.
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._client, name)
+
+    def stats(self):
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _acquire(self, contents):
+        # 요청 수/토큰 수 한도와 동시 실행 수 제한을 차례로 통과할 때까지 기다립니다.
+        started = time.perf_counter()
+        deadline = time.monotonic() + self.queue_timeout
+        if not self._requests.acquire(timeout=self.queue_timeout):
+            self._count("rate_limited")
+            raise RateLimitTimeout("요청이 많아 AI 호출 대기 시간이 초과되었습니다. 잠시 후 다시 시도해주세요.")
+        if not self._tokens.acquire(estimate_request_tokens(contents), timeout=max(0.0, deadline - time.monotonic())):
+            self._count("rate_limited")
+            raise RateLimitTimeout("요청이 많아 AI 호출 대기 시간이 초과되었습니다. 잠시 후 다시 시도해주세요.")
+        if not self._slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            self._count("rate_limited")
+            raise RateLimitTimeout("동시에 처리 중인 AI 요청이 많아 대기 시간이 초과되었습니다.")
+        waited_ms = (time.perf_counter() - started) * 1000
+        if waited_ms >= 1:
+            telemetry.record_span("gemini.queue", waited_ms)
+
+    def _with_retries(self, call, contents):
+        for attempt in range(self.max_retries + 1):
+            self._acquire(contents)
+            try:
+                self._count("requests")
+                return call()
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable_error(e):
+                    raise
+                error = e
+            finally:
+                self._slots.release()
+            delay = backoff_delay(attempt, self.backoff_seconds)
+            self._count("retries")
+            logging.warning(f"Gemini 호출 재시도 ({attempt + 1}/{self.max_retries}), {delay:.1f}초 대기: {error}")
+            with telemetry.span("gemini.backoff", retries=1, status_code=getattr(error, "code", None)):
+                time.sleep(delay)
+
+    def generate_content(self, model, contents, config=None):
+        key = _request_key(model, contents, config)
+        if key is None:
+            return self._with_retries(lambda: self._client.models.generate_content(model=model, contents=contents, config=config), contents)
+
+        # 같은 요청이 이미 진행 중이면(다른 세션에서 같은 공고/경험으로 분석 등) 새로 호출하지 않고 그 결과를 함께 받습니다.
+        with self._inflight_lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _InFlight()
+        if not leader:
+            self._count("coalesced")
+            with telemetry.span("gemini.coalesced"):
+                call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.response
+
+        try:
+            call.response = self._with_retries(lambda: self._client.models.generate_content(model=model, contents=contents, config=config), contents)
+            return call.response
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+            call.done.set()
+
+    def embed_content(self, model, contents, config=None):
+        return self._with_retries(lambda: self._client.models.embed_content(model=model, contents=contents, config=config), contents)
+
+    def generate_content_stream(self, model, contents, config=None):
+        # 스트리밍 응답은 합치지 않고, 첫 청크를 받기 전에 난 오류만 다시 시도합니다.
+        for attempt in range(self.max_retries + 1):
+            self._acquire(contents)
+            received = False
+            try:
+                self._count("requests")
+                for chunk in self._client.models.generate_content_stream(model=model, contents=contents, config=config):
+                    received = True
+                    yield chunk
+                return
+            except Exception as e:
+                if received or attempt >= self.max_retries or not is_retryable_error(e):
+                    raise
+                error = e
+            finally:
+                self._slots.release()
+            delay = backoff_delay(attempt, self.backoff_seconds)
+            self._count("retries")
+            logging.warning(f"Gemini 스트리밍 호출 재시도 ({attempt + 1}/{self.max_retries}), {delay:.1f}초 대기: {error}")
+            with telemetry.span("gemini.backoff", retries=1, status_code=getattr(error, "code", None)):
+                time.sleep(delay)
@@ -0,0 +1,84 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from cache_store import CACHE_DIR, make_cache_key
+
+# --- 분석 히스토리 저장소 ---
+# 사이드바에는 요약(제목, 적합도, 시각)만 페이지 단위로 읽고, 전체 분석 결과는 "👀"을 눌렀을 때만 불러옵니다.
+# 캐시와 달리 지워지면 안 되는 데이터이므로 캐시 DB와 별도 파일에 저장합니다.
+HISTORY_DB_PATH = os.environ.get("JOJUN_HISTORY_DB", os.path.join(CACHE_DIR, "history.sqlite3"))
+HISTORY_MAX_ENTRIES = int(os.environ.get("JOJUN_HISTORY_MAX_ENTRIES", 200))
+HISTORY_PAGE_SIZE = int(os.environ.get("JOJUN_HISTORY_PAGE_SIZE", 5))
+
+class HistoryStore:
+    def __init__(self, db_path=HISTORY_DB_PATH, max_entries=HISTORY_MAX_ENTRIES):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, owner TEXT NOT NULL, title TEXT NOT NULL,
+                fit_score INTEGER, created_at REAL NOT NULL, content_hash TEXT NOT NULL, payload BLOB NOT NULL,
+                UNIQUE (owner, content_hash))""")
+            conn.execute("CREATE INDEX IF NOT EXISTS history_owner_created ON history (owner, created_at DESC)")
+            self._local.conn = conn
+        return conn
+
+    def add(self, owner, title, fit_score, analysis_result):
+        # 같은 결과를 다시 저장하면(캐시된 분석 등) 새 줄을 만들지 않고 시각만 갱신하여 맨 위로 올립니다.
+        payload = json.dumps(analysis_result, ensure_ascii=False, sort_keys=True)
+        content_hash = make_cache_key(payload)
+        now = time.time()
+        try:
+            conn = self._connect()
+            conn.execute("""INSERT INTO history (owner, title, fit_score, created_at, content_hash, payload) VALUES (?, ?, ?, ?, ?, ?)
+                            ON CONFLICT (owner, content_hash) DO UPDATE SET created_at = excluded.created_at, title = excluded.title""",
+                         (owner, title, fit_score, now, content_hash, zlib.compress(payload.encode("utf-8"))))
+            self._prune(conn, owner)
+        except sqlite3.Error as e:
+            logging.warning(f"히스토리 저장 실패: {e}")
+
+    def _prune(self, conn, owner):
+        if self.max_entries:
+            conn.execute("""DELETE FROM history WHERE owner = ? AND id NOT IN (
+                            SELECT id FROM history WHERE owner = ? ORDER BY created_at DESC LIMIT ?)""", (owner, owner, self.max_entries))
+
+    def list(self, owner, limit=10, offset=0):
+        try:
+            rows = self._connect().execute("SELECT id, title, fit_score, created_at, content_hash FROM history WHERE owner = ? ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                                           (owner, limit, offset)).fetchall()
+        except sqlite3.Error as e:
+            logging.warning(f"히스토리 조회 실패: {e}")
+            return []
+        return [{"id": row[0], "title": row[1], "fit_score": row[2], "created_at": row[3], "content_hash": row[4]} for row in rows]
+
+    def count(self, owner):
+        try:
+            return self._connect().execute("SELECT COUNT(*) FROM history WHERE owner = ?", (owner,)).fetchone()[0]
+        except sqlite3.Error as e:
+            logging.warning(f"히스토리 조회 실패: {e}")
+            return 0
+
+    def load(self, owner, entry_id):
+        try:
+            row = self._connect().execute("SELECT payload FROM history WHERE owner = ? AND id = ?", (owner, entry_id)).fetchone()
+            return json.loads(zlib.decompress(row[0]).decode("utf-8")) if row else None
+        except (sqlite3.Error, zlib.error, ValueError) as e:
+            logging.warning(f"히스토리 불러오기 실패: {e}")
+            return None
+
+    def delete(self, owner, entry_id):
+        try:
+            self._connect().execute("DELETE FROM history WHERE owner = ? AND id = ?", (owner, entry_id))
+        except sqlite3.Error as e:
+            logging.warning(f"히스토리 삭제 실패: {e}")
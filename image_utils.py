@@ -0,0 +1,162 @@
+import hashlib
+import io
+import math
+import threading
+from collections import OrderedDict
+from PIL import Image, ImageChops, ImageOps
+
+# --- 이미지 식별 ---
+def content_hash(image_bytes):
+    return hashlib.sha256(image_bytes).hexdigest()
+
+def image_fingerprint(img, hash_size=16):
+    # 차이 해시(dHash): 축소한 흑백 이미지에서 가로로 인접한 픽셀의 밝기 비교 결과를 비트로 만듭니다.
+    # 다시 캡처하거나 재인코딩한 같은 화면은 비트가 거의 바뀌지 않습니다.
+    gray = img.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS)
+    pixels = gray.tobytes()
+    bits = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return bits
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+def detail_thumbnail(img, width=256):
+    # 확인용 고해상도 축소본: 글자 줄까지 구분되도록 가로 256px 흑백으로 줄입니다.
+    gray = img.convert("L")
+    return gray.resize((width, max(1, round(gray.height * width / gray.width))), Image.Resampling.BOX)
+
+def max_tile_difference(a, b, tile=8):
+    # 두 축소본의 차이를 8px 칸마다 평균 내어 가장 많이 다른 칸의 값(0~255)을 돌려줍니다.
+    # 재인코딩/배율 변경은 모든 칸이 조금씩 다르지만, 글자가 바뀐 칸은 크게 다릅니다.
+    if a.size != b.size:
+        b = b.resize(a.size, Image.Resampling.BOX)
+    diff = ImageChops.difference(a, b)
+    return diff.resize((max(1, a.width // tile), max(1, a.height // tile)), Image.Resampling.BOX).getextrema()[1]
+
+# --- 유사 이미지 색인 ---
+# 글자가 대부분인 스크린샷은 축소하면 서로 비슷해 보이므로(같은 양식의 다른 공고는 dHash가 같은 경우가 많음),
+# 해시 거리와 가로세로 비율로 후보를 고른 뒤 고해상도 축소본의 칸별 차이로 같은 화면인지 한 번 더 확인합니다.
+class PerceptualIndex:
+    def __init__(self, max_entries=32, max_distance=12, max_aspect_delta=0.02, max_tile_delta=20):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.max_aspect_delta = max_aspect_delta
+        self.max_tile_delta = max_tile_delta
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, key, fingerprint, aspect_ratio, thumbnail):
+        with self._lock:
+            self._entries[key] = (fingerprint, aspect_ratio, thumbnail)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def find(self, fingerprint, aspect_ratio, thumbnail):
+        with self._lock:
+            candidates = sorted((hamming_distance(fingerprint, other), key, other_thumbnail)
+                                for key, (other, other_ratio, other_thumbnail) in self._entries.items()
+                                if abs(other_ratio - aspect_ratio) <= self.max_aspect_delta * other_ratio)
+        for distance, key, other_thumbnail in candidates:
+            if distance > self.max_distance:
+                break
+            if max_tile_difference(other_thumbnail, thumbnail) <= self.max_tile_delta:
+                return key
+        return None
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+# --- OCR 전처리 ---
+# 전체 해상도 스크린샷을 그대로 보내면 업로드가 느리고 비전 토큰도 많이 쓰므로,
+# 글자를 읽을 수 있는 범위에서 줄이고 흑백으로 다시 인코딩합니다. 글자 캡처는 흑백 PNG가 JPEG보다 작고 번짐도 없습니다.
+IMAGE_MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png"}
+# 세로가 가로의 이 배수보다 긴 이미지(긴 공고 캡처)는 가로 폭만 맞추고 세로로 잘라서 보냅니다.
+TALL_IMAGE_ASPECT = 2.0
+# Gemini는 384px 이하 이미지를 258토큰으로, 그보다 크면 768px 타일마다 258토큰으로 계산합니다.
+VISION_TILE_SIZE = 768
+VISION_TILE_TOKENS = 258
+
+def estimate_vision_tokens(width, height):
+    if width <= 384 and height <= 384:
+        return VISION_TILE_TOKENS
+    return math.ceil(width / VISION_TILE_SIZE) * math.ceil(height / VISION_TILE_SIZE) * VISION_TILE_TOKENS
+
+def _flatten(img, grayscale):
+    # 투명 배경은 검게 바뀌지 않도록 흰 배경에 합성합니다.
+    if img.mode in ("RGBA", "LA", "P"):
+        img = img.convert("RGBA")
+        background = Image.new("RGBA", img.size, "white")
+        background.alpha_composite(img)
+        img = background
+    return img.convert("L" if grayscale else "RGB")
+
+def _scale_factor(img, max_long_edge, target_dpi):
+    scale = 1.0
+    dpi = img.info.get("dpi")
+    if dpi and target_dpi and dpi[0] > target_dpi:
+        scale = target_dpi / dpi[0]
+    width, height = img.size
+    long_edge = width if height / width >= TALL_IMAGE_ASPECT else max(width, height)
+    return min(scale, max_long_edge / long_edge)
+
+def _find_cut(gray, start, limit):
+    # 글자 줄이 잘리지 않도록 자를 위치 근처(아래쪽 1/4 구간)에서 가장 밝기 변화가 적은(빈) 줄을 고릅니다.
+    best_row, best_range = limit, 256
+    for row in range(limit, start + (limit - start) * 3 // 4, -1):
+        low, high = gray.crop((0, row - 1, gray.width, row)).getextrema()
+        if high - low < best_range:
+            best_row, best_range = row, high - low
+            if best_range == 0:
+                break
+    return best_row
+
+def split_tall_image(img, tile_height):
+    gray = img if img.mode == "L" else img.convert("L")
+    tiles, top = [], 0
+    while img.height - top > tile_height:
+        cut = _find_cut(gray, top, top + tile_height)
+        tiles.append(img.crop((0, top, img.width, cut)))
+        top = cut
+    tiles.append(img.crop((0, top, img.width, img.height)))
+    return tiles
+
+def encode_image(img, fmt="JPEG", quality=80):
+    buffer = io.BytesIO()
+    if fmt == "JPEG":
+        img.save(buffer, format="JPEG", quality=quality, optimize=True)
+    elif fmt == "WEBP":
+        img.save(buffer, format="WEBP", quality=quality, method=4)
+    else:
+        img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def prepare_for_ocr(img, max_long_edge=1536, target_dpi=150, fmt="PNG", quality=80, grayscale=True, original_bytes=None):
+    # (바이트, MIME 타입) 목록을 위에서부터 순서대로 돌려줍니다. 긴 이미지가 아니면 항목은 하나입니다.
+    # original_bytes를 주면, 줄이거나 자를 필요가 없고 다시 인코딩한 결과가 원본보다 작지 않을 때 원본을 그대로 돌려줍니다.
+    # 줄이거나 자른 경우에는 긴 변 제한을 지키도록 타일마다 원본 형식으로도 인코딩해 보고 더 작은 쪽을 씁니다.
+    original_format = img.format
+    original_mime = IMAGE_MIME_TYPES.get(original_format)
+    img = ImageOps.exif_transpose(img)
+    scale = _scale_factor(img, max_long_edge, target_dpi)
+    img = _flatten(img, grayscale)
+    if scale < 1:
+        img = img.resize((max(1, round(img.width * scale)), max(1, round(img.height * scale))), Image.Resampling.LANCZOS)
+    tiles = split_tall_image(img, max_long_edge) if img.height > max_long_edge else [img]
+    parts = [(encode_image(tile, fmt, quality), IMAGE_MIME_TYPES[fmt]) for tile in tiles]
+    if not original_bytes or not original_mime:
+        return parts
+    if scale >= 1 and len(tiles) == 1:
+        return [(original_bytes, original_mime)] if len(parts[0][0]) >= len(original_bytes) else parts
+    if original_format == fmt:
+        return parts
+    smaller = []
+    for tile, (data, mime) in zip(tiles, parts):
+        alternative = encode_image(tile, original_format, quality)
+        smaller.append((alternative, original_mime) if len(alternative) < len(data) else (data, mime))
+    return smaller
@@ -1,17 +1,22 @@
 import streamlit as st
 from dotenv import load_dotenv
-import requests
-from bs4 import BeautifulSoup
 import plotly.graph_objects as go
-from ai_analyzer import run_full_analysis, ocr_with_gemini
-import PyPDF2
-from pptx import Presentation
+from ai_analyzer import stream_full_analysis, ocr_with_gemini, get_analysis_cache, preview_analysis, with_script_ctx, DEFAULT_ANALYSIS_MODE
+from history_store import HistoryStore, HISTORY_PAGE_SIZE
+import telemetry
 import io
 import os
 import re
+import threading
+import time
+import uuid
 from streamlit.errors import StreamlitSecretNotFoundError
 from streamlit_paste_button import paste_image_button
 
+# PyPDF2/python-pptx(파일 업로드), lxml/requests(URL 가져오기), Gemini SDK(AI 호출)는 해당 기능을 처음 쓸 때 가져옵니다.
+# plotly는 Streamlit이 시작할 때 이미 불러오므로 여기서 미뤄도 이득이 없습니다.
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+
 # --- 페이지 설정 및 환경 구성 ---
 st.set_page_config(layout="wide", page_title="JOJUN - AI 직무 역량 조준기", initial_sidebar_state="expanded")
 
@@ -31,35 +36,27 @@ if not api_key:
     st.stop()
 
 # --- 스타일링 ---
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Pretendard:wght@400;600;700&display=swap');
-    .stApp { font-family: 'Pretendard', sans-serif; }
-    div[data-testid="stAppViewContainer"] > .main .block-container { max-width: 100%; }
-    .stButton>button { font-family: 'Pretendard', sans-serif; font-weight: 700; font-size: 16px; color: white; background-color: #4A4A4A; border: none; border-radius: 10px; padding: 12px 0; transition: all 0.2s ease-in-out; }
-    .stButton>button:hover { background-color: #2a2a2a; transform: scale(1.02); }
-    .stButton>button:active { background-color: #1a1a1a !important; transform: scale(0.98) !important; color: white !important; }
-    .kpi-card { background-color: #FFFFFF; border-left: 5px solid #4A4A4A; color: #333; border-radius: 10px; padding: 20px; box-shadow: 0 4px 8px rgba(0,0,0,0.1); margin-bottom: 10px; height: 180px; display: flex; flex-direction: column; justify-content: space-between; }
-    .kpi-title { font-size: 1.1rem; font-weight: 700; margin-bottom: 15px; }
-    .kpi-scores { display: flex; justify-content: space-between; align-items: center; }
-    .kpi-score-box { text-align: center; }
-    .kpi-score-label { font-size: 0.8rem; }
-    .kpi-score-value { font-size: 1.8rem; font-weight: 700; }
-    .kpi-delta { text-align: center; font-size: 1.2rem; font-weight: 700; }
-    .delta-positive { color: #28a745 !important; }
-    .delta-negative { color: #dc3545 !important; }
-    .delta-zero { color: #6c757d !important; }
-    .ai-comment-card { background-color: #f8f9fa; border: 1px solid #dee2e6; border-radius: 10px; padding: 25px; margin-top: 5px; }
-    .ai-comment-title { font-size: 1.2rem; font-weight: 700; margin-bottom: 10px; color: #4A4A4A; }
-    .ai-comment-body { font-size: 1rem; line-height: 1.6; color: #343a40; }
-    [data-theme="dark"] .kpi-card, [data-theme="dark"] .ai-comment-card { background-color: #262730; border-color: #444; }
-    [data-theme="dark"] .kpi-title, [data-theme="dark"] .kpi-score-value, [data-theme="dark"] .ai-comment-title, [data-theme="dark"] .ai-comment-body { color: #FAFAFA; }
-    [data-theme="dark"] .kpi-score-label { color: #A0A0A0; }
-</style>
-""", unsafe_allow_html=True)
+# 스크립트는 상호작용마다 다시 실행되므로, 스타일시트는 프로세스당 한 번만 읽어 두고 재사용합니다.
+@st.cache_resource
+def load_stylesheet():
+    with open(os.path.join(ASSETS_DIR, "style.css"), encoding="utf-8") as f:
+        return f"<style>\n{f.read()}</style>"
+
+st.markdown(load_stylesheet(), unsafe_allow_html=True)
 
 # --- 유틸리티 함수 ---
-def parse_and_display_suggestions(text):
+def _display_suggestion(title, guidance, example, expanded=False):
+    with st.expander(f"🎯 **{title}** 역량 강화하기", expanded=expanded):
+        st.markdown("##### 💡 개선 방안")
+        st.info(guidance)
+        st.markdown("##### ✍️ 추천 예시 문구")
+        st.code(example, language='text')
+
+def _display_question(number, question, intent, expanded=False):
+    with st.expander(f"**질문 {number}:** {question}", expanded=expanded):
+        st.markdown(f"**🔍 질문 의도:** {intent}")
+
+def parse_and_display_suggestions(text, expanded=False):
     # ###로 시작하는 각 제안 블록을 찾습니다.
     for match in re.finditer(r"###\s*(.*?)(?=###|$)", text, re.DOTALL):
         suggestion = match.group(1).strip()
@@ -74,16 +71,12 @@ def parse_and_display_suggestions(text):
             example_match = re.search(r"\*\*예시 문구:\*\*\s*(.*)", suggestion, re.DOTALL)
             example = example_match.group(1).strip().replace('"', '') if example_match else "내용 없음"
 
-            with st.expander(f"🎯 **{title}** 역량 강화하기"):
-                st.markdown("##### 💡 개선 방안")
-                st.info(guidance)
-                st.markdown("##### ✍️ 추천 예시 문구")
-                st.code(example, language='text')
+            _display_suggestion(title, guidance, example, expanded)
         except (IndexError, AttributeError) as e:
             st.warning(f"AI 제안을 표시하는 중 일부 내용에 오류가 있었습니다: {e}")
             st.text(suggestion)
 
-def parse_and_display_questions(text):
+def parse_and_display_questions(text, expanded=False):
     # ###로 시작하는 각 질문 블록을 찾습니다.
     for i, match in enumerate(re.finditer(r"###\s*(.*?)(?=###|$)", text, re.DOTALL)):
         question_block = match.group(1).strip()
@@ -94,40 +87,176 @@ def parse_and_display_questions(text):
             question = parts[0].strip()
             intent = parts[1].strip() if len(parts) > 1 else "의도 파악 불가"
 
-            with st.expander(f"**질문 {i+1}:** {question}"):
-                st.markdown(f"**🔍 질문 의도:** {intent}")
+            _display_question(i + 1, question, intent, expanded)
         except (IndexError, AttributeError) as e:
             st.warning(f"AI 예상 질문을 표시하는 중 일부 내용에 오류가 있었습니다: {e}")
             st.text(question_block)
 
-# --- 파일 처리 및 상태 관리 함수 ---
-def _handle_pdf(file_bytes): return "\n".join(page.extract_text() for page in PyPDF2.PdfReader(io.BytesIO(file_bytes)).pages)
-def _handle_pptx(file_bytes): 
-    text = []
-    for slide in Presentation(io.BytesIO(file_bytes)).slides:
-        for shape in slide.shapes:
-            if hasattr(shape, "text"): text.append(shape.text)
-    return "\n".join(text)
-def _handle_image(file_bytes, file_name): 
-    with st.spinner(f"'{file_name}' 이미지 분석 중..."): return ocr_with_gemini(file_bytes) or ""
-def _handle_text(file_bytes): return file_bytes.decode("utf-8", errors='ignore')
+def display_suggestions(suggestions, expanded=False):
+    # 단일 호출 모드는 구조화된 목록을, 개별 호출 모드는 마크다운 텍스트를 돌려줍니다.
+    if not suggestions: st.info("생성된 이력서 제안이 없습니다.")
+    elif isinstance(suggestions, list):
+        for item in suggestions: _display_suggestion(item.get('target') or "AI 제안", item.get('guidance') or "내용 없음", item.get('example') or "내용 없음", expanded)
+    else: parse_and_display_suggestions(suggestions, expanded)
+
+def display_questions(questions, expanded=False):
+    if not questions: st.info("생성된 예상 면접 질문이 없습니다.")
+    elif isinstance(questions, list):
+        for i, item in enumerate(questions): _display_question(i + 1, item.get('question', ''), item.get('intent') or "의도 파악 불가", expanded)
+    else: parse_and_display_questions(questions, expanded)
+
+# --- 결과 화면 렌더링 ---
+# 두 차트가 함께 쓰는 레이아웃 템플릿(plotly_white + Pretendard 글꼴)은 한 번만 만들어 재사용합니다.
+@st.cache_resource
+def get_chart_template():
+    import plotly.io as pio
+    template = go.layout.Template(pio.templates["plotly_white"])
+    template.layout.font.family = "Pretendard, sans-serif"
+    return template
+
+def render_overview(analysis_data):
+    if 'fit_score' not in analysis_data: st.info("역량 분석 결과가 없습니다. 이력서 코칭과 예상 면접 질문을 확인해주세요.")
+    col1, col2 = st.columns([1, 2])
+    with col1: st.metric(label="직무 적합도", value=f"{analysis_data.get('fit_score', 0)}점"); st.progress(analysis_data.get('fit_score', 0))
+    with col2: st.markdown(f"<div class='ai-comment-card'><div class='ai-comment-title'>💡 AI 총평</div><div class='ai-comment-body'>{analysis_data.get('overall_comment', '')}</div></div>", unsafe_allow_html=True)
+    st.divider()
+    st.subheader("📈 역량 비교 분석")
+    categories = analysis_data.get('categories', []); job_scores = analysis_data.get('job_scores', []); user_scores = analysis_data.get('user_scores', [])
+    if categories and job_scores and user_scores:
+        fig = go.Figure()
+        fig.add_trace(go.Scatterpolar(r=job_scores, theta=categories, fill='toself', name='요구 역량 (JD)', line_color='rgba(74, 74, 74, 0.8)', fillcolor='rgba(74, 74, 74, 0.2)'))
+        fig.add_trace(go.Scatterpolar(r=user_scores, theta=categories, fill='toself', name='보유 역량 (나)', line_color='rgba(255, 140, 0, 0.8)', fillcolor='rgba(255, 140, 0, 0.2)'))
+        fig.update_layout(polar=dict(radialaxis=dict(visible=True, range=[0, 100], showline=False, showticklabels=False, ticks='')), showlegend=True, title=dict(text="<b>역량 적합도 레이더 차트</b>", font=dict(size=20), x=0.5), font=dict(size=14), legend=dict(yanchor="top", y=1.1, xanchor="center", x=0.5, orientation="h"), template=get_chart_template(), margin=dict(t=80, b=20))
+        st.plotly_chart(fig, use_container_width=True)
+        st.subheader("🔍 역량별 상세 점수")
+        cols = st.columns(min(len(categories), 3))
+        for i, category in enumerate(categories):
+            job_score = job_scores[i]; user_score = user_scores[i]; delta = user_score - job_score
+            delta_color, delta_sign = ("positive", "+") if delta > 0 else (("negative", "") if delta < 0 else ("zero", ""))
+            with cols[i % min(len(categories), 3)]: st.markdown(f"<div class='kpi-card'><div class='kpi-title'>{category}</div><div class='kpi-scores'><div class='kpi-score-box'><div class='kpi-score-label'>요구 역량</div><div class='kpi-score-value'>{job_score}</div></div><div class='kpi-score-box'><div class='kpi-score-label'>보유 역량</div><div class='kpi-score-value'>{user_score}</div></div><div class='kpi-delta'><div class='kpi-score-label'>차이</div><div class='{delta_color}'>{delta_sign}{delta}</div></div></div></div>", unsafe_allow_html=True)
+
+def render_result_tabs():
+    tab1, tab2, tab3 = st.tabs(["📊 종합 분석", "💡 이력서 코칭", "💬 예상 면접 질문"])
+    with tab1: st.subheader("🎯 종합 분석"); overview_slot = st.empty()
+    with tab2: st.subheader("✨ AI 기반 이력서 맞춤 제안"); suggestions_slot = st.empty()
+    with tab3: st.subheader("💬 AI 예상 면접 질문"); questions_slot = st.empty()
+    return overview_slot, suggestions_slot, questions_slot
+
+def run_streaming_analysis(jd_text, my_exp_text, mode):
+    # 역량 분석이 끝나는 즉시 점수와 차트를, 이력서 제안과 면접 질문은 토큰이 도착하는 대로 그립니다.
+    started = time.perf_counter()
+    status_slot = st.empty()
+    status_slot.info("AI 'JOJUN'이 당신의 역량을 정밀 분석 중입니다...")
+    overview_slot, suggestions_slot, questions_slot = render_result_tabs()
+    overview_slot.caption("⏳ 역량 분석 중...")
+    suggestions_slot.caption("⏳ 이력서 제안 생성 중...")
+    questions_slot.caption("⏳ 예상 면접 질문 생성 중...")
+
+    # 과거 분석에서 모은 역량 색인으로 예상 역량과 적합도를 보여줍니다. AI 요청을 늦추지 않도록 분석과 동시에 별도 스레드에서 계산하며,
+    # 역량 분석 결과가 먼저 도착했다면 미리보기는 표시하지 않습니다.
+    overview_lock, overview_state = threading.Lock(), {'final': False}
+    def show_preview():
+        preview = preview_analysis(jd_text, my_exp_text)
+        with overview_lock:
+            if preview and not overview_state['final']:
+                overview_slot.caption(f"⏳ 역량 분석 중... (미리보기: 예상 핵심 역량 {', '.join(preview['categories'])} · 예상 적합도 약 {preview['fit_score']}점)")
+    stream = stream_full_analysis(jd_text, my_exp_text, mode=mode)
+    threading.Thread(target=with_script_ctx(show_preview), name="jojun-preview", daemon=True).start()
+
+    renderers = {'suggestions': (suggestions_slot, display_suggestions), 'interview_questions': (questions_slot, display_questions)}
+    first_content_s, last_rendered, analysis_result = None, {}, None
+    for key, value, finished in stream:
+        if key in ('competency', 'done'):
+            with overview_lock: overview_state['final'] = True
+        if key == 'done':
+            analysis_result = value
+            break
+        if first_content_s is None and value:
+            first_content_s = time.perf_counter() - started
+        if key == 'competency':
+            with overview_slot.container():
+                if value: render_overview(value)
+                else: st.warning("역량 분석 결과를 받지 못했습니다.")
+            continue
+        # 화면 갱신 비용을 줄이기 위해 중간 결과는 0.2초에 한 번만 다시 그립니다.
+        now = time.perf_counter()
+        if finished or now - last_rendered.get(key, 0) >= 0.2:
+            slot, display = renderers[key]
+            with slot.container(): display(value, expanded=not finished)
+            last_rendered[key] = now
+    status_slot.empty()
+
+    timing = {'first_content_s': first_content_s, 'total_s': time.perf_counter() - started}
+    return analysis_result, timing
+
+# --- 성능 패널 ---
+TRACE_LABELS = {'analysis': "AI 분석", 'url_fetch': "URL 가져오기", 'image_paste': "이미지 붙여넣기"}
 
+def remember_trace(trace_summary):
+    st.session_state.last_traces[trace_summary['name']] = trace_summary
+
+def render_performance_panel(traces):
+    with st.expander("⏱️ 성능 분석 (마지막 실행)", expanded=True):
+        for name, trace in traces.items():
+            spans = trace['spans']
+            gemini_spans = [span for span in spans if span['stage'].startswith("gemini.")]
+            st.markdown(f"**{TRACE_LABELS.get(name, name)}** · 전체 {trace['duration_ms'] / 1000:.2f}초 · AI 호출 {len(gemini_spans)}회 · "
+                        f"토큰 {sum(span.get('prompt_tokens', 0) for span in spans):,} / {sum(span.get('output_tokens', 0) for span in spans):,} (입력/출력) · "
+                        f"캐시 적중 {sum(1 for span in spans if span.get('cache_hit'))}회")
+            if not spans:
+                st.caption("기록된 단계가 없습니다.")
+                continue
+            # 단계별 시작 시점과 소요 시간을 가로 막대로 그려 어느 단계가 병목인지 보여줍니다.
+            fig = go.Figure(go.Bar(y=[span['stage'] for span in spans], x=[span['duration_ms'] for span in spans], base=[span.get('offset_ms', 0) for span in spans], orientation='h',
+                                   marker_color=['#dc3545' if span.get('error') else ('#28a745' if span.get('cache_hit') else '#4A4A4A') for span in spans],
+                                   hovertemplate="%{y}: %{x:.0f}ms<extra></extra>"))
+            fig.update_layout(height=80 + 28 * len(spans), margin=dict(t=10, b=30, l=10, r=10), xaxis_title="ms", yaxis=dict(autorange="reversed"), template=get_chart_template())
+            st.plotly_chart(fig, use_container_width=True, key=f"perf_{trace['trace_id']}")
+            st.dataframe([{
+                "단계": span['stage'], "시작(ms)": span.get('offset_ms'), "소요(ms)": span['duration_ms'],
+                "입력 크기": span.get('input_bytes'), "입력 토큰": span.get('prompt_tokens'), "출력 토큰": span.get('output_tokens'),
+                "캐시 적중": span.get('cache_hit'), "재시도": span.get('retries'), "오류": span.get('error'),
+            } for span in spans], hide_index=True, use_container_width=True)
+
+def save_analysis(analysis_result, timing):
+    st.session_state.analysis_data = analysis_result
+    st.session_state.last_timing = timing
+    # 히스토리 저장 (IndexError 방지)
+    title = "새로운 분석" # 기본값
+    if analysis_result.get('categories'):
+        title = f"{analysis_result['categories'][0]} 직무"
+    get_history_store().add(st.session_state.history_owner, title, analysis_result.get('fit_score', 0), analysis_result)
+    st.session_state.history_page = 0
+
+# --- 분석 히스토리 ---
+# 세션에는 지금 보고 있는 분석 결과 하나만 두고, 히스토리는 SQLite에 저장해 새로고침해도 유지합니다.
+@st.cache_resource
+def get_history_store():
+    return HistoryStore()
+
+def get_history_owner():
+    # 로그인 기능이 없으므로 URL의 uid로 사용자를 구분합니다. 같은 주소로 다시 접속하면 히스토리가 이어집니다.
+    owner = st.query_params.get("uid")
+    if not owner:
+        owner = uuid.uuid4().hex
+        st.query_params["uid"] = owner
+    return owner
+
+# --- 파일 처리 및 상태 관리 함수 ---
 def parse_input_files(uploaded_files):
     if not uploaded_files: return ""
-    file_handlers = {'pdf': _handle_pdf, 'pptx': _handle_pptx, 'jpg': _handle_image, 'jpeg': _handle_image, 'png': _handle_image, 'txt': _handle_text, 'md': _handle_text}
-    all_text = []
+    from file_parser import extract_files
+    # 파일은 병렬로 처리되므로 끝나는 대로 진행률을 갱신하고, 결과는 업로드 순서대로 합칩니다.
+    all_text = [None] * len(uploaded_files)
     progress_bar = st.sidebar.progress(0)
-    for i, file in enumerate(uploaded_files):
-        try:
-            ext = file.name.split('.')[-1].lower()
-            handler = file_handlers.get(ext, _handle_text)
-            content = handler(file.getvalue(), file.name) if ext in ['jpg', 'jpeg', 'png'] else handler(file.getvalue())
-            all_text.append(content)
-        except Exception as e: st.sidebar.error(f"'{file.name}' 처리 오류: {e}")
-        finally: progress_bar.progress((i + 1) / len(uploaded_files), f"'{file.name}' 처리 완료!")
+    files = [(file.name, file.getvalue()) for file in uploaded_files]
+    for completed, (i, file_name, content, error) in enumerate(extract_files(files), start=1):
+        if error: st.sidebar.error(f"'{file_name}' 처리 오류: {error}")
+        else: all_text[i] = content
+        progress_bar.progress(completed / len(uploaded_files), f"'{file_name}' 처리 완료!")
     progress_bar.empty()
     st.sidebar.success(f"{len(uploaded_files)}개 파일 분석 완료!")
-    return "\n".join(all_text)
+    return "\n".join(text for text in all_text if text is not None)
 
 def initialize_state():
     if 'app_initialized' not in st.session_state:
@@ -136,7 +265,11 @@ def initialize_state():
         st.session_state.jd_text = ""
         st.session_state.my_exp_text = ""
         st.session_state.analysis_data = None
-        st.session_state.history = []
+        st.session_state.history_owner = get_history_owner()
+        st.session_state.history_page = 0
+        st.session_state.last_timing = None
+        st.session_state.last_traces = {}
+        st.session_state.last_fetched_url = None
 
 initialize_state()
 
@@ -147,43 +280,69 @@ with st.sidebar:
     st.divider()
 
     with st.expander("📜 분석 히스토리", expanded=True):
-        if not st.session_state.history:
+        history_store = get_history_store()
+        owner = st.session_state.history_owner
+        total = history_store.count(owner)
+        page_count = max(1, -(-total // HISTORY_PAGE_SIZE))
+        page = min(st.session_state.history_page, page_count - 1)
+        if not total:
             st.caption("아직 분석 기록이 없습니다.")
-        for i, record in enumerate(st.session_state.history):
+        # 현재 페이지의 요약만 읽고, 전체 결과는 👀을 눌렀을 때 불러옵니다.
+        for record in history_store.list(owner, HISTORY_PAGE_SIZE, page * HISTORY_PAGE_SIZE):
             col1, col2, col3 = st.columns([3, 1, 1])
             with col1:
-                st.info(f"**{record['title']}** (적합도: {record['fit_score']}점)")
+                st.info(f"**{record['title']}** (적합도: {record['fit_score']}점)  \n{time.strftime('%m/%d %H:%M', time.localtime(record['created_at']))}")
             with col2:
-                if st.button("👀", key=f"view_{i}", use_container_width=True):
-                    st.session_state.analysis_data = record['data']
+                if st.button("👀", key=f"view_{record['id']}", use_container_width=True):
+                    analysis_data = history_store.load(owner, record['id'])
+                    if analysis_data:
+                        st.session_state.analysis_data = analysis_data
+                        st.session_state.last_timing = None
+                        st.rerun()
+                    st.warning("분석 기록을 불러오지 못했습니다.")
+            with col3:
+                if st.button("🗑️", key=f"del_{record['id']}", use_container_width=True):
+                    history_store.delete(owner, record['id'])
                     st.rerun()
+        if page_count > 1:
+            col1, col2, col3 = st.columns([1, 2, 1])
+            with col1:
+                if st.button("◀", key="history_prev", disabled=page == 0, use_container_width=True):
+                    st.session_state.history_page = page - 1
+                    st.rerun()
+            with col2:
+                st.caption(f"{page + 1} / {page_count} 페이지 (총 {total}건)")
             with col3:
-                if st.button("🗑️", key=f"del_{i}", use_container_width=True):
-                    st.session_state.history.pop(i)
+                if st.button("▶", key="history_next", disabled=page >= page_count - 1, use_container_width=True):
+                    st.session_state.history_page = page + 1
                     st.rerun()
     st.divider()
 
     st.header("1. 채용 공고 입력")
     with st.expander("🔗 URL에서 가져오기", expanded=False):
         url_input = st.text_input("채용 공고 URL", key="url_input")
-        if url_input:
+        refresh_url = st.button("🔄 다시 가져오기", key="refresh_url", disabled=not url_input)
+        # 다른 위젯을 조작해도 스크립트가 다시 실행되므로, URL이 바뀌었거나 직접 요청한 경우에만 가져옵니다.
+        if url_input and (url_input != st.session_state.last_fetched_url or refresh_url):
+            from url_fetcher import fetch_page_text
+            st.session_state.last_fetched_url = url_input
+            url_trace = telemetry.start_trace("url_fetch")
             try:
-                headers = {'User-Agent': 'Mozilla/5.0'}
-                response = requests.get(url_input, headers=headers, timeout=5)
-                response.raise_for_status()
-                soup = BeautifulSoup(response.content, 'html.parser')
-                st.session_state.jd_text = soup.find('body').get_text(separator='\n', strip=True)
+                st.session_state.jd_text = fetch_page_text(url_input, refresh=refresh_url)
                 st.success("URL 내용을 성공적으로 가져왔습니다.")
             except Exception as e: st.error(f"URL 처리 오류: {e}")
+            finally: remember_trace(telemetry.end_trace(url_trace))
 
     with st.expander("✍️ 붙여넣기 & 직접 수정", expanded=True):
         paste_result = paste_image_button("📋 클립보드 이미지 붙여넣기", key="paste_button")
         if paste_result.image_data and paste_result.image_data != st.session_state.last_pasted_image:
             st.session_state.last_pasted_image = paste_result.image_data
-            with st.spinner("이미지 분석 중..."):
+            with st.spinner("이미지 분석 중..."), telemetry.trace("image_paste") as paste_trace:
                 img_bytes_io = io.BytesIO()
-                paste_result.image_data.save(img_bytes_io, format="PNG")
+                # 캐시 키 계산과 OCR 전처리에만 쓰이는 중간 결과이므로 압축률보다 속도를 우선합니다.
+                paste_result.image_data.save(img_bytes_io, format="PNG", compress_level=1)
                 ocr_text = ocr_with_gemini(img_bytes_io.getvalue())
+            remember_trace(paste_trace.to_dict())
             if ocr_text:
                 st.session_state.jd_text += "\n" + ocr_text
                 st.info("이미지 텍스트를 공고 내용에 추가했습니다.")
@@ -202,7 +361,11 @@ with st.sidebar:
         my_files = st.file_uploader("PDF, PPTX, TXT, MD", type=["pdf", "pptx", "txt", "md"], accept_multiple_files=True, key="my_files_uploader")
 
     st.divider()
+    pending_analysis, analysis_trace = None, None
+    single_shot = st.toggle("⚡ 단일 호출 모드", value=DEFAULT_ANALYSIS_MODE == "single", key="single_shot_mode", help="역량 분석, 이력서 제안, 예상 면접 질문을 한 번의 AI 호출로 받아 더 빠르고 저렴하게 분석합니다.")
     if st.button("✨ AI로 합격률 조준하기", use_container_width=True):
+        # 파일 추출부터 AI 분석까지 하나의 트레이스로 기록합니다. 분석은 본문 영역에서 이어서 실행됩니다.
+        analysis_trace = telemetry.start_trace("analysis")
         final_jd_text = st.session_state.jd_text
         if 'jd_files' in locals() and jd_files: final_jd_text += "\n" + parse_input_files(jd_files)
         final_my_exp_text = st.session_state.my_exp_text
@@ -211,66 +374,47 @@ with st.sidebar:
         if not final_jd_text.strip() or not final_my_exp_text.strip():
             st.warning("채용 공고와 나의 경험을 모두 입력(또는 업로드)해주세요.")
             st.session_state.analysis_data = None
+            telemetry.end_trace(analysis_trace, export=False)
         else:
-            with st.spinner("AI 'JOJUN'이 당신의 역량을 정밀 분석 중입니다..."):
-                analysis_result = run_full_analysis(final_jd_text, final_my_exp_text)
-                if analysis_result:
-                    st.session_state.analysis_data = analysis_result
-                    # 히스토리 저장 (IndexError 방지)
-                    title = "새로운 분석" # 기본값
-                    if analysis_result.get('categories'):
-                        title = f"{analysis_result['categories'][0]} 직무"
-                    history_entry = {
-                        'title': title,
-                        'fit_score': analysis_result.get('fit_score', 0),
-                        'data': analysis_result
-                    }
-                    st.session_state.history.insert(0, history_entry)
+            # 분석 결과는 본문 영역에 점진적으로 그려지므로, 여기서는 입력만 넘겨둡니다.
+            pending_analysis = (final_jd_text, final_my_exp_text, "single" if single_shot else "multi")
+
+    st.toggle("⏱️ 성능 패널 보기", key="show_performance", help="마지막 실행의 단계별 소요 시간, 토큰 수, 캐시 적중 여부를 보여줍니다.")
+
+    cache_stats = get_analysis_cache().stats()
+    if cache_stats['hits'] or cache_stats['misses']:
+        st.caption(f"💾 분석 캐시: 적중 {cache_stats['hits']}회 / 미스 {cache_stats['misses']}회 (저장 {cache_stats['entries']}건)")
 
 st.title("🎯 JOJUN: AI 직무 역량 분석")
 
-if st.session_state.analysis_data:
+if pending_analysis:
+    try: analysis_result, timing = run_streaming_analysis(*pending_analysis)
+    finally: remember_trace(telemetry.end_trace(analysis_trace))
+    if analysis_result:
+        save_analysis(analysis_result, timing)
+        st.rerun()
+elif st.session_state.analysis_data:
     analysis_data = st.session_state.analysis_data
     st.success("🎉 분석 완료!") # 타임스탬프 제거
+    timing = st.session_state.last_timing
+    if timing and timing.get('first_content_s') is not None:
+        st.caption(f"⏱️ 첫 결과 표시까지 {timing['first_content_s']:.1f}초, 전체 분석 {timing['total_s']:.1f}초")
+    compaction = analysis_data.get('compaction')
+    if compaction and compaction['saved_tokens_total']:
+        truncated = " (토큰 예산을 넘는 부분은 생략됨)" if compaction['jd']['truncated'] or compaction['experience']['truncated'] else ""
+        st.caption(f"🧹 입력 정리로 호출당 약 {compaction['saved_tokens_per_call']:,} 토큰, 전체 약 {compaction['saved_tokens_total']:,} 토큰을 절약했습니다{truncated}.")
 
-    tab1, tab2, tab3 = st.tabs(["📊 종합 분석", "💡 이력서 코칭", "💬 예상 면접 질문"])
-
-    with tab1:
-        st.subheader("🎯 종합 분석")
-        col1, col2 = st.columns([1, 2])
-        with col1: st.metric(label="직무 적합도", value=f"{analysis_data.get('fit_score', 0)}점"); st.progress(analysis_data.get('fit_score', 0))
-        with col2: st.markdown(f"<div class='ai-comment-card'><div class='ai-comment-title'>💡 AI 총평</div><div class='ai-comment-body'>{analysis_data.get('overall_comment', '')}</div></div>", unsafe_allow_html=True)
-        st.divider()
-        st.subheader("📈 역량 비교 분석")
-        categories = analysis_data.get('categories', []); job_scores = analysis_data.get('job_scores', []); user_scores = analysis_data.get('user_scores', [])
-        if categories and job_scores and user_scores:
-            fig = go.Figure()
-            fig.add_trace(go.Scatterpolar(r=job_scores, theta=categories, fill='toself', name='요구 역량 (JD)', line_color='rgba(74, 74, 74, 0.8)', fillcolor='rgba(74, 74, 74, 0.2)'))
-            fig.add_trace(go.Scatterpolar(r=user_scores, theta=categories, fill='toself', name='보유 역량 (나)', line_color='rgba(255, 140, 0, 0.8)', fillcolor='rgba(255, 140, 0, 0.2)'))
-            fig.update_layout(polar=dict(radialaxis=dict(visible=True, range=[0, 100], showline=False, showticklabels=False, ticks='')), showlegend=True, title=dict(text="<b>역량 적합도 레이더 차트</b>", font=dict(size=20), x=0.5), font=dict(family="Pretendard, sans-serif", size=14), legend=dict(yanchor="top", y=1.1, xanchor="center", x=0.5, orientation="h"), template="plotly_white", margin=dict(t=80, b=20))
-            st.plotly_chart(fig, use_container_width=True)
-            st.subheader("🔍 역량별 상세 점수")
-            cols = st.columns(min(len(categories), 3))
-            for i, category in enumerate(categories):
-                job_score = job_scores[i]; user_score = user_scores[i]; delta = user_score - job_score
-                delta_color, delta_sign = ("positive", "+") if delta > 0 else (("negative", "") if delta < 0 else ("zero", ""))
-                with cols[i % min(len(categories), 3)]: st.markdown(f"<div class='kpi-card'><div class='kpi-title'>{category}</div><div class='kpi-scores'><div class='kpi-score-box'><div class='kpi-score-label'>요구 역량</div><div class='kpi-score-value'>{job_score}</div></div><div class='kpi-score-box'><div class='kpi-score-label'>보유 역량</div><div class='kpi-score-value'>{user_score}</div></div><div class='kpi-delta'><div class='kpi-score-label'>차이</div><div class='{delta_color}'>{delta_sign}{delta}</div></div></div></div>", unsafe_allow_html=True)
-
-    with tab2:
-        st.subheader("✨ AI 기반 이력서 맞춤 제안")
-        suggestions = analysis_data.get('suggestions', "")
-        if suggestions: parse_and_display_suggestions(suggestions)
-        else: st.info("생성된 이력서 제안이 없습니다.")
-
-    with tab3:
-        st.subheader("💬 AI 예상 면접 질문")
-        questions = analysis_data.get('interview_questions', "")
-        if questions: parse_and_display_questions(questions)
-        else: st.info("생성된 예상 면접 질문이 없습니다.")
+    overview_slot, suggestions_slot, questions_slot = render_result_tabs()
+    with overview_slot.container(): render_overview(analysis_data)
+    with suggestions_slot.container(): display_suggestions(analysis_data.get('suggestions'))
+    with questions_slot.container(): display_questions(analysis_data.get('interview_questions'))
 else:
     st.markdown("### 👋 JOJUN에 오신 것을 환영합니다!")
     st.markdown("JOJUN은 AI를 통해 채용 공고와 당신의 경험을 비교 분석하여, 직무 적합도를 알려주는 스마트한 비서입니다.")
     st.info("**시작하려면, 왼쪽 사이드바에 채용 공고와 자신의 이력서/경험을 입력하고 'AI로 합격률 조준하기' 버튼을 눌러주세요.**")
 
+if st.session_state.get('show_performance') and st.session_state.last_traces:
+    render_performance_panel(st.session_state.last_traces)
+
 st.markdown("<hr>", unsafe_allow_html=True)
 st.markdown("<p style='text-align: center; font-size: 0.8em; color: #888;'>Made with ❤️ by JOJUN</p>", unsafe_allow_html=True)
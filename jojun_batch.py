@@ -0,0 +1,153 @@
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+from dotenv import load_dotenv
+from cache_store import make_cache_key
+from image_utils import content_hash
+
+# --- 배치 분석 CLI ---
+# 하나의 경험(이력서)을 여러 채용 공고와 비교하고, 결과를 직무 적합도(fit_score) 순으로 저장합니다.
+# 예시:
+#   python jojun_batch.py --experience resume.pdf --jd jd1.pdf jd2.txt --url https://... --output results/run.jsonl --csv results/ranked.csv
+#   python jojun_batch.py --experience resume.md --jsonl postings.jsonl --output results/run.jsonl
+#   python jojun_batch.py --experience resume.md --jsonl postings.jsonl --preview --csv results/preview.csv
+#   python jojun_batch.py --experience resume.md --jsonl postings.jsonl --shortlist 10 --output results/run.jsonl
+# 같은 --output으로 다시 실행하면 이미 성공한 공고는 건너뛰고 남은 공고만 분석합니다.
+# --preview는 AI 분석 없이 과거 분석으로 만든 역량 색인만으로 순위를 매기고, --shortlist N은 미리보기 상위 N개만 AI로 분석합니다.
+
+def _quiet_streamlit_logs():
+    # Streamlit 앱 밖에서 실행되므로 "missing ScriptRunContext" 경고를 숨깁니다.
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).setLevel(logging.ERROR)
+    # Streamlit이 설정을 읽을 때 로그 레벨을 다시 정하므로 이 경고를 내는 로거는 아예 끕니다.
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").disabled = True
+
+def _read_files(paths):
+    from file_parser import extract_files
+    files = []
+    for path in paths:
+        with open(path, "rb") as f:
+            files.append((os.path.basename(path), f.read()))
+    texts = [None] * len(files)
+    for index, file_name, text, error in extract_files(files):
+        if error:
+            logging.error(f"'{file_name}' 처리 오류: {error}")
+        texts[index] = text
+    return files, texts
+
+def load_experience(args):
+    if args.experience_text:
+        return args.experience_text
+    _, texts = _read_files(args.experience)
+    return "\n".join(text for text in texts if text)
+
+def load_postings(args):
+    # 공고 ID는 내용(파일/텍스트) 또는 URL로 정해지므로, 다시 실행해도 같은 공고는 같은 ID를 갖습니다.
+    postings = []
+    if args.jd:
+        files, texts = _read_files(args.jd)
+        for path, (file_name, file_bytes), text in zip(args.jd, files, texts):
+            if text:
+                postings.append({"id": make_cache_key("file", content_hash(file_bytes))[:16], "title": file_name, "source": os.path.abspath(path), "text": text})
+    for url in args.url or []:
+        postings.append({"id": make_cache_key("url", url)[:16], "url": url})
+    for path in args.jsonl or []:
+        with open(path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                if item.get("path"):
+                    _, texts = _read_files([item["path"]])
+                    item.setdefault("source", os.path.abspath(item["path"]))
+                    item["text"] = texts[0] or ""
+                if not item.get("text") and not item.get("url"):
+                    logging.warning(f"{path}:{line_number} 항목에 text/url/path가 없어 건너뜁니다.")
+                    continue
+                item.setdefault("id", make_cache_key("jsonl", item.get("url") or item["text"])[:16])
+                postings.append(item)
+    return postings
+
+def write_ranked_results(records, csv_path=None, ranked_jsonl_path=None):
+    if ranked_jsonl_path:
+        with open(ranked_jsonl_path, "w", encoding="utf-8") as f:
+            for rank, record in enumerate(records, start=1):
+                f.write(json.dumps({"rank": rank, **record}, ensure_ascii=False) + "\n")
+    if csv_path:
+        # 엑셀에서 한글이 깨지지 않도록 BOM을 붙여 저장합니다.
+        with open(csv_path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["rank", "id", "title", "source", "status", "fit_score", "categories", "overall_comment", "attempts", "error"])
+            for rank, record in enumerate(records, start=1):
+                analysis = record.get("analysis") or {}
+                writer.writerow([rank, record["id"], record.get("title") or "", record.get("source") or "", record["status"], record.get("fit_score", ""),
+                                 " / ".join(analysis.get("categories", [])), analysis.get("overall_comment", ""), record.get("attempts", ""), record.get("error", "")])
+
+def print_ranking(records, ok_status="ok"):
+    print(f"\n{'순위':<4} {'적합도':>6}  공고")
+    for rank, record in enumerate(records, start=1):
+        score = record.get("fit_score", "-") if record["status"] == ok_status else "실패"
+        print(f"{rank:<4} {score:>6}  {record.get('title') or record.get('source') or record['id']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="JOJUN 배치 분석: 하나의 경험을 여러 채용 공고와 비교합니다.")
+    experience = parser.add_mutually_exclusive_group(required=True)
+    experience.add_argument("--experience", nargs="+", help="경험(이력서/포트폴리오) 파일 경로 (PDF, PPTX, TXT, MD, 이미지)")
+    experience.add_argument("--experience-text", help="경험 텍스트를 직접 입력")
+    parser.add_argument("--jd", nargs="+", help="채용 공고 파일 경로")
+    parser.add_argument("--url", nargs="+", help="채용 공고 URL")
+    parser.add_argument("--jsonl", nargs="+", help='채용 공고 목록 JSONL (한 줄에 {"id", "title", "text" | "url" | "path"})')
+    parser.add_argument("--output", help="분석 결과 JSONL (중단 후 재실행 시 이어서 진행, --preview가 아니면 필수)")
+    parser.add_argument("--csv", help="적합도 순으로 정렬한 CSV 저장 경로")
+    parser.add_argument("--ranked-jsonl", help="적합도 순으로 정렬한 JSONL 저장 경로")
+    parser.add_argument("--workers", type=int, help="동시에 분석할 공고 수")
+    parser.add_argument("--rpm", type=int, help="분당 최대 분석 공고 수")
+    parser.add_argument("--retries", type=int, help="할당량 초과(429) 등 일시적 오류 시 최대 재시도 횟수")
+    parser.add_argument("--mode", choices=["multi", "single"], help="분석 방식 (기본: JOJUN_ANALYSIS_MODE 또는 multi)")
+    parser.add_argument("--preview", action="store_true", help="AI 분석 없이 역량 색인 유사도로만 빠르게 순위 매기기")
+    parser.add_argument("--shortlist", type=int, help="미리보기 점수 상위 N개 공고만 AI로 분석")
+    parser.add_argument("--preview-embedder", choices=["hashing", "gemini"], help="미리보기 임베딩 방식 (기본: JOJUN_PREVIEW_EMBEDDER 또는 hashing)")
+    args = parser.parse_args()
+    if not (args.jd or args.url or args.jsonl):
+        parser.error("--jd, --url, --jsonl 중 하나 이상으로 채용 공고를 지정해주세요.")
+    if not args.preview and not args.output:
+        parser.error("--output으로 분석 결과를 저장할 경로를 지정해주세요.")
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    import ai_analyzer
+    _quiet_streamlit_logs()
+
+    user_experience = load_experience(args)
+    if not user_experience.strip():
+        sys.exit("경험 내용을 읽지 못했습니다.")
+    postings = load_postings(args)
+
+    if args.preview or args.shortlist:
+        previews = ai_analyzer.run_batch_preview(user_experience, postings, args.preview_embedder)
+        if args.preview:
+            write_ranked_results(previews, args.csv, args.ranked_jsonl)
+            print_ranking(previews, "preview")
+            return
+        # 미리보기를 만들지 못한 공고는 순위를 알 수 없으므로 AI 분석 대상에 그대로 남깁니다.
+        ranked = [record["id"] for record in previews if record["status"] == "preview"][:args.shortlist]
+        unranked = [record["id"] for record in previews if record["status"] != "preview"]
+        print(f"미리보기 상위 {len(ranked)}개와 미리보기를 만들지 못한 {len(unranked)}개 공고를 AI로 분석합니다.", flush=True)
+        postings = [posting for posting in postings if posting["id"] in set(ranked + unranked)]
+
+    def on_progress(done, total, record):
+        score = f"{record['fit_score']}점" if record["status"] == "ok" else f"실패 ({record.get('error')})"
+        print(f"[{done}/{total}] {record.get('title') or record.get('source') or record['id']}: {score}", flush=True)
+
+    options = {key: value for key, value in (("max_workers", args.workers), ("items_per_minute", args.rpm), ("max_retries", args.retries)) if value is not None}
+    records = ai_analyzer.run_batch_analysis(user_experience, postings, args.output, mode=args.mode, on_progress=on_progress, **options)
+    write_ranked_results(records, args.csv, args.ranked_jsonl)
+
+    print_ranking(records)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import random
+import threading
+import time
+
+# --- 재시도 대상 오류 ---
+# 할당량 초과(429)와 일시적인 서버 오류는 잠시 후 다시 시도하면 성공할 수 있습니다.
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+def is_retryable_error(error):
+    # Gemini SDK 오류는 code, requests 오류는 response.status_code에 상태 코드가 있습니다.
+    status = getattr(error, "code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status in RETRYABLE_STATUS_CODES
+
+def backoff_delay(attempt, base_seconds=2.0, max_seconds=60.0):
+    # 지수 백오프 + 전체 지터: 여러 작업자가 동시에 다시 몰려드는 것을 막습니다.
+    return random.uniform(0, min(max_seconds, base_seconds * (2 ** attempt)))
+
+# --- 토큰 버킷 ---
+class TokenBucket:
+    def __init__(self, rate, per_seconds=60.0, capacity=None):
+        self.rate_per_second = rate / per_seconds
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_second)
+        self._updated = now
+
+    def acquire(self, amount=1, timeout=None):
+        # 버킷 용량보다 큰 요청은 영원히 기다리지 않도록 용량만큼으로 줄입니다.
+        amount = min(amount, self.capacity)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return True
+                wait_seconds = (amount - self._tokens) / self.rate_per_second
+            if deadline is not None and now + wait_seconds > deadline:
+                return False
+            time.sleep(wait_seconds)
@@ -0,0 +1,194 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from cache_store import CACHE_DIR
+
+# --- 설정 ---
+# 빈 문자열로 지정하면 해당 출력은 끕니다.
+TELEMETRY_ENABLED = os.environ.get("JOJUN_TELEMETRY", "1") == "1"
+TELEMETRY_JSONL_PATH = os.environ.get("JOJUN_TELEMETRY_JSONL", os.path.join(CACHE_DIR, "telemetry.jsonl"))
+TELEMETRY_PROM_PATH = os.environ.get("JOJUN_TELEMETRY_PROM", os.path.join(CACHE_DIR, "metrics.prom"))
+# JSONL 파일이 이 크기를 넘으면 telemetry.jsonl.1, .2 ... 로 밀어내고 새 파일에 씁니다. 보관 개수를 넘는 오래된 파일은 지웁니다.
+TELEMETRY_JSONL_MAX_MB = float(os.environ.get("JOJUN_TELEMETRY_JSONL_MAX_MB", 16))
+TELEMETRY_JSONL_BACKUPS = int(os.environ.get("JOJUN_TELEMETRY_JSONL_BACKUPS", 3))
+
+# --- 트레이스 ---
+# 한 번의 사용자 동작(분석, URL 가져오기 등)에서 생긴 단계(span)들을 모읍니다.
+# 현재 트레이스는 contextvar로 전달되므로 with_script_ctx로 시작한 작업 스레드의 단계도 같은 트레이스에 기록됩니다.
+class Trace:
+    def __init__(self, name):
+        self.name = name
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.started_at = time.time()
+        self.duration_ms = None
+        self.spans = []
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            self.spans.append(record)
+
+    def finish(self):
+        self.duration_ms = (time.perf_counter() - self._started) * 1000
+
+    def to_dict(self):
+        with self._lock:
+            spans = sorted(self.spans, key=lambda record: record["offset_ms"])
+        return {"name": self.name, "trace_id": self.trace_id, "started_at": self.started_at, "duration_ms": self.duration_ms, "spans": spans}
+
+_current_trace = contextvars.ContextVar("jojun_trace", default=None)
+
+def current_trace():
+    return _current_trace.get()
+
+def start_trace(name):
+    # 여러 코드 블록에 걸친 트레이스(예: 사이드바의 파일 추출 + 본문의 분석)는 start_trace/end_trace로 직접 감쌉니다.
+    trace = Trace(name)
+    trace.token = _current_trace.set(trace)
+    return trace
+
+def end_trace(trace, export=True):
+    try:
+        _current_trace.reset(trace.token)
+    except ValueError:
+        # 다른 컨텍스트(다음 rerun 등)에서 닫는 경우에는 현재 값만 비웁니다.
+        _current_trace.set(None)
+    trace.finish()
+    if export and TELEMETRY_ENABLED:
+        export_trace(trace)
+    return trace.to_dict()
+
+@contextmanager
+def trace(name):
+    current = start_trace(name)
+    try:
+        yield current
+    finally:
+        end_trace(current)
+
+# --- 단계(span) 기록 ---
+def record_span(stage, duration_ms, **attrs):
+    # 생성기처럼 with 블록으로 감싸기 어려운 구간은 직접 잰 시간을 기록합니다.
+    current = _current_trace.get()
+    record = {"stage": stage, "duration_ms": round(duration_ms, 2), **attrs}
+    if current is not None:
+        record["offset_ms"] = round((time.perf_counter() - current._started) * 1000 - duration_ms, 2)
+        current.add(record)
+    _metrics.observe(record)
+    return record
+
+@contextmanager
+def span(stage, **attrs):
+    # with 블록 안에서 돌려받은 dict에 입력 크기, 토큰 수, 캐시 적중 여부 등을 덧붙입니다.
+    started = time.perf_counter()
+    try:
+        yield attrs
+    except Exception as e:
+        attrs["error"] = type(e).__name__
+        raise
+    finally:
+        record_span(stage, (time.perf_counter() - started) * 1000, **attrs)
+
+def usage_attrs(response):
+    # Gemini 응답의 usage_metadata에서 토큰 수를 꺼냅니다.
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return {}
+    return {
+        "prompt_tokens": getattr(usage, "prompt_token_count", None) or 0,
+        "output_tokens": getattr(usage, "candidates_token_count", None) or 0,
+    }
+
+# --- 누적 지표 (Prometheus 텍스트 형식) ---
+class _Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def observe(self, record):
+        with self._lock:
+            stage = self._stages.setdefault(record["stage"], {"count": 0, "seconds": 0.0, "errors": 0, "cache_hits": 0, "retries": 0, "prompt_tokens": 0, "output_tokens": 0})
+            stage["count"] += 1
+            stage["seconds"] += record["duration_ms"] / 1000
+            stage["errors"] += 1 if record.get("error") else 0
+            stage["cache_hits"] += 1 if record.get("cache_hit") else 0
+            stage["retries"] += record.get("retries", 0)
+            stage["prompt_tokens"] += record.get("prompt_tokens", 0)
+            stage["output_tokens"] += record.get("output_tokens", 0)
+
+    def render(self):
+        with self._lock:
+            stages = {name: dict(values) for name, values in sorted(self._stages.items())}
+        lines = [
+            "# HELP jojun_stage_duration_seconds Time spent per stage.",
+            "# TYPE jojun_stage_duration_seconds summary",
+        ]
+        for name, values in stages.items():
+            lines.append(f'jojun_stage_duration_seconds_sum{{stage="{name}"}} {values["seconds"]:.6f}')
+            lines.append(f'jojun_stage_duration_seconds_count{{stage="{name}"}} {values["count"]}')
+        counters = [
+            ("jojun_stage_errors_total", "errors", "Stage executions that raised an error."),
+            ("jojun_stage_cache_hits_total", "cache_hits", "Stage executions served from a cache."),
+            ("jojun_stage_retries_total", "retries", "Retries performed inside a stage."),
+        ]
+        for metric, key, help_text in counters:
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+            lines += [f'{metric}{{stage="{name}"}} {values[key]}' for name, values in stages.items()]
+        lines += ["# HELP jojun_gemini_tokens_total Gemini tokens reported in usage metadata.", "# TYPE jojun_gemini_tokens_total counter"]
+        for name, values in stages.items():
+            if values["prompt_tokens"] or values["output_tokens"]:
+                lines.append(f'jojun_gemini_tokens_total{{stage="{name}",type="prompt"}} {values["prompt_tokens"]}')
+                lines.append(f'jojun_gemini_tokens_total{{stage="{name}",type="output"}} {values["output_tokens"]}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+_metrics = _Metrics()
+_export_lock = threading.Lock()
+
+def render_prometheus():
+    return _metrics.render()
+
+def reset_metrics():
+    _metrics.reset()
+
+def _rotate_jsonl(path):
+    # 여러 세션이 같은 파일에 쓰므로, 공유 서버에서 기록이 끝없이 쌓이지 않도록 크기 기준으로 교체합니다.
+    if not TELEMETRY_JSONL_MAX_MB or not os.path.exists(path) or os.path.getsize(path) < TELEMETRY_JSONL_MAX_MB * 1024 * 1024:
+        return
+    if TELEMETRY_JSONL_BACKUPS <= 0:
+        os.remove(path)
+        return
+    for number in range(TELEMETRY_JSONL_BACKUPS - 1, 0, -1):
+        if os.path.exists(f"{path}.{number}"):
+            os.replace(f"{path}.{number}", f"{path}.{number + 1}")
+    os.replace(path, f"{path}.1")
+
+def export_trace(trace):
+    # JSONL에는 단계마다 한 줄씩 추가하고, Prometheus 파일은 node_exporter textfile 수집기가 읽을 수 있도록 통째로 바꿔 씁니다.
+    data = trace.to_dict()
+    try:
+        with _export_lock:
+            if TELEMETRY_JSONL_PATH:
+                os.makedirs(os.path.dirname(os.path.abspath(TELEMETRY_JSONL_PATH)), exist_ok=True)
+                _rotate_jsonl(TELEMETRY_JSONL_PATH)
+                with open(TELEMETRY_JSONL_PATH, "a", encoding="utf-8") as f:
+                    for record in data["spans"]:
+                        f.write(json.dumps({"trace_id": data["trace_id"], "trace": data["name"], "ts": data["started_at"], **record}, ensure_ascii=False) + "\n")
+                    f.write(json.dumps({"trace_id": data["trace_id"], "trace": data["name"], "ts": data["started_at"], "stage": "total", "duration_ms": round(data["duration_ms"], 2)}, ensure_ascii=False) + "\n")
+            if TELEMETRY_PROM_PATH:
+                os.makedirs(os.path.dirname(os.path.abspath(TELEMETRY_PROM_PATH)), exist_ok=True)
+                temp_path = f"{TELEMETRY_PROM_PATH}.{os.getpid()}.tmp"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    f.write(render_prometheus())
+                os.replace(temp_path, TELEMETRY_PROM_PATH)
+    except OSError as e:
+        logging.warning(f"성능 기록 저장 실패: {e}")
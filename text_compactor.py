@@ -0,0 +1,99 @@
+import math
+import os
+import re
+import unicodedata
+
+# --- 토큰 예산 ---
+JD_TOKEN_BUDGET = int(os.environ.get("JOJUN_JD_TOKEN_BUDGET", 6000))
+EXPERIENCE_TOKEN_BUDGET = int(os.environ.get("JOJUN_EXPERIENCE_TOKEN_BUDGET", 12000))
+TRUNCATION_MARKER = "...(이하 생략)"
+
+# 웹 페이지에서 긁어온 공고에 섞이는 푸터/쿠키 안내 문구와 메뉴 이름입니다. 공고 텍스트에만 적용합니다.
+# 문구가 줄 어딘가에 들어 있기만 한 줄("개인정보 처리방침 수립 및 개정")은 실제 업무일 수 있으므로,
+# 저작권 표시로 시작하거나, 사업자 정보 항목이거나, 푸터 링크 이름만으로 이루어진 줄만 지웁니다.
+FOOTER_LINK = r"(개인정보\s*처리\s*방침|개인정보\s*취급\s*방침|privacy policy|이용\s*약관|terms of (use|service)|쿠키\s*정책|cookie policy|고객\s*센터|회사\s*소개)"
+FOOTER_PATTERNS = re.compile(
+    r"^(copyright\b|ⓒ|©|\(c\)\s*\d{4})"
+    r"|all rights reserved\.?$"
+    r"|^(사업자\s*등록\s*번호|통신\s*판매\s*업\s*(신고)?\s*(번호)?)\s*[:：]"
+    rf"|^{FOOTER_LINK}(\s*[|/·]\s*{FOOTER_LINK})*$"
+    r"|^((이\s*)?(웹\s*)?사이트는\s*)?쿠키를\s*사용(합니다|하고 있습니다)"
+    r"|^(we|this (web)?site) uses? cookies\b",
+    re.IGNORECASE,
+)
+NAV_PATTERNS = re.compile(
+    r"^(로그인|회원가입|log ?in|sign ?in|sign ?up|바로\s*가기|공유하기|스크랩|맨\s*위로|앱\s*다운로드|고객\s*센터|관련\s*공고|추천\s*공고|메뉴|menu|홈|home|닫기|close)"
+    r"(\s*[/|·]\s*(로그인|회원가입|log ?in|sign ?in|sign ?up))?$",
+    re.IGNORECASE,
+)
+# 이보다 짧은 줄(예: "Python", "2023.01")은 여러 번 나와도 의미가 있을 수 있어 중복 제거하지 않습니다.
+MIN_DEDUPE_LENGTH = 10
+
+# --- 토큰 수 추정 ---
+def estimate_tokens(text):
+    # Gemini 토크나이저 근사치: 한글은 약 1.5자당 1토큰, 그 외 문자는 약 4자당 1토큰으로 계산합니다.
+    if not text:
+        return 0
+    hangul = sum(1 for ch in text if "가" <= ch <= "힣")
+    return math.ceil(hangul / 1.5 + (len(text) - hangul) / 4)
+
+# --- 텍스트 정리 ---
+def _dedupe_key(text):
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+def _is_boilerplate(line):
+    return NAV_PATTERNS.match(line) is not None or FOOTER_PATTERNS.search(line) is not None
+
+def _truncate_to_budget(lines, token_budget):
+    kept, used = [], 0
+    for line in lines:
+        tokens = estimate_tokens(line) + 1
+        if used + tokens > token_budget:
+            # 줄바꿈 없이 긴 텍스트도 예산만큼은 남도록 마지막 줄을 비율에 맞춰 자릅니다.
+            partial = line[:int(len(line) * (token_budget - used) / tokens)]
+            if partial.strip():
+                kept.append(partial)
+            kept.append(TRUNCATION_MARKER)
+            break
+        kept.append(line)
+        used += tokens
+    return kept
+
+def compact_text(text, token_budget=None, strip_boilerplate=False):
+    # strip_boilerplate는 웹에서 가져온 공고에만 켭니다. 사용자가 직접 쓴 경험 텍스트는 공백/중복 정리와 예산만 적용합니다.
+    text = unicodedata.normalize("NFC", text or "")
+    original_tokens = estimate_tokens(text)
+
+    # 1. 문단 단위 중복 제거 (여러 파일을 이어 붙이면 같은 문단이 반복되는 경우가 많습니다)
+    seen_paragraphs, seen_lines, lines = set(), set(), []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph_key = _dedupe_key(paragraph)
+        if not paragraph_key or paragraph_key in seen_paragraphs:
+            continue
+        seen_paragraphs.add(paragraph_key)
+
+        # 2. 줄 단위 공백/상용구 정리 및 중복 제거
+        for line in paragraph.splitlines():
+            line = re.sub(r"[ \t ​]+", " ", line).strip()
+            if not line or (strip_boilerplate and _is_boilerplate(line)):
+                continue
+            line_key = _dedupe_key(line)
+            if len(line_key) >= MIN_DEDUPE_LENGTH:
+                if line_key in seen_lines:
+                    continue
+                seen_lines.add(line_key)
+            lines.append(line)
+
+    # 3. 토큰 예산 적용
+    if token_budget:
+        lines = _truncate_to_budget(lines, token_budget)
+
+    compacted = "\n".join(lines)
+    compacted_tokens = estimate_tokens(compacted)
+    stats = {
+        "original_tokens": original_tokens,
+        "compacted_tokens": compacted_tokens,
+        "saved_tokens": max(0, original_tokens - compacted_tokens),
+        "truncated": bool(lines) and lines[-1] == TRUNCATION_MARKER,
+    }
+    return compacted, stats
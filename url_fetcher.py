@@ -0,0 +1,193 @@
+import codecs
+import copy
+import os
+import re
+import threading
+import time
+import lxml.html
+import requests
+from requests.adapters import HTTPAdapter
+from cache_store import PersistentCache, make_cache_key
+import telemetry
+
+REQUEST_HEADERS = {'User-Agent': 'Mozilla/5.0'}
+
+# --- 설정 ---
+# 마지막으로 가져온 뒤 URL_CACHE_FRESH_SECONDS 동안은 다시 요청하지 않고, 그 뒤에는 ETag/Last-Modified로 변경 여부만 확인합니다.
+URL_CACHE_FRESH_SECONDS = int(os.environ.get("JOJUN_URL_CACHE_FRESH_SECONDS", 600))
+URL_CACHE_TTL = int(os.environ.get("JOJUN_URL_CACHE_TTL", 24 * 3600))
+URL_POOL_SIZE = int(os.environ.get("JOJUN_URL_POOL_SIZE", 8))
+# 본문 추출 방식이 바뀌면 이 값을 올려서 이전에 캐시된 텍스트가 재사용되지 않도록 합니다.
+EXTRACTOR_VERSION = "3"
+
+# --- 공유 세션 ---
+# 같은 사이트를 다시 요청할 때 TCP/TLS 연결을 재사용하도록 프로세스 전체에서 하나의 세션을 씁니다.
+_session_lock = threading.Lock()
+_session = None
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            session.headers.update(REQUEST_HEADERS)
+            adapter = HTTPAdapter(pool_connections=URL_POOL_SIZE, pool_maxsize=URL_POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+_page_cache = PersistentCache("url", ttl_seconds=URL_CACHE_TTL, max_bytes=16 * 1024 * 1024)
+
+def clear_url_cache():
+    _page_cache.clear()
+
+# --- 본문 추출 ---
+# 메뉴, 푸터, 스크립트 등 공고 내용과 무관한 요소를 지운 뒤, 링크가 적고 글이 많은 영역을 본문으로 고릅니다.
+# 화면에 보이지 않는 태그는 항상 지우고, 메뉴/광고처럼 보이는 요소는 페이지 글의 일부만 담고 있을 때만 지웁니다.
+# (class="job-ad-content", "content with-sidebar"처럼 이름만 비슷한 요소가 공고 전체를 감싸는 경우가 있습니다.)
+HIDDEN_TAGS = ["script", "style", "noscript", "template", "svg"]
+NOISE_TAGS = ["iframe", "form", "button", "nav", "aside"]
+NOISE_ROLES = {"navigation", "banner", "contentinfo", "search", "dialog", "alert"}
+NOISE_ATTR_PATTERN = re.compile(r"(^|[\s_-])(nav|gnb|lnb|menu|footer|sidebar|cookie|banner|breadcrumb|share|sns|related|recommend|comment|advert|ad|popup|modal|login)([\s_-]|$)", re.IGNORECASE)
+BLOCK_TAGS = ("p", "div", "section", "article", "main", "li", "ul", "ol", "dl", "dt", "dd", "table", "tr", "td", "th", "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote", "br")
+CANDIDATE_TAGS = ("section", "div", "td")
+# 본문 후보가 페이지 전체 글자 수에서 이 비율보다 적으면 잘못 고른 것으로 보고 정리된 전체 본문을 사용합니다.
+MIN_MAIN_CONTENT_RATIO = 0.3
+# 메뉴/광고로 보이는 요소라도 페이지 글자 수의 이 비율보다 많이 담고 있으면 지우지 않습니다.
+NOISE_MAX_SHARE = 0.3
+# 정리한 결과가 정리 전 본문 글자 수의 이 비율보다 적으면 지나치게 지운 것으로 보고 정리 전 본문을 사용합니다.
+MIN_PRUNED_RATIO = 0.1
+META_CHARSET_PATTERN = re.compile(rb"<meta[^>]+charset=[\"']?([\w-]+)", re.IGNORECASE)
+
+def _drop_hidden(body):
+    for element in body.xpath(".//" + " | .//".join(HIDDEN_TAGS)):
+        element.drop_tree()
+
+def _drop_noise(body):
+    max_length = _text_length(body) * NOISE_MAX_SHARE
+    def drop(element):
+        if _text_length(element) <= max_length:
+            element.drop_tree()
+    for element in body.xpath(".//" + " | .//".join(NOISE_TAGS)):
+        drop(element)
+    # 사이트 공통 머리말/꼬리말만 지우고, 본문(article/main) 안의 제목 영역은 남깁니다.
+    for element in body.xpath(".//header[not(ancestor::main or ancestor::article)] | .//footer[not(ancestor::main or ancestor::article)]"):
+        drop(element)
+    for element in body.xpath(".//*[@role or @class or @id or @aria-hidden]"):
+        attrs = f"{element.get('class', '')} {element.get('id', '')}"
+        if element.get("role") in NOISE_ROLES or element.get("aria-hidden") == "true" or NOISE_ATTR_PATTERN.search(attrs):
+            drop(element)
+
+def _text_length(element):
+    return len(re.sub(r"\s+", "", element.text_content()))
+
+def _link_density(element, text_length):
+    link_length = sum(_text_length(link) for link in element.iter("a"))
+    return link_length / text_length if text_length else 1.0
+
+def _find_main_content(body):
+    explicit = body.xpath(".//main | .//article | .//*[@role='main']")
+    if explicit:
+        return max(explicit, key=_text_length)
+    best, best_score = None, 0
+    for element in body.iter(*CANDIDATE_TAGS):
+        text_length = _text_length(element)
+        # 글이 길수록, 링크 비율이 낮을수록, 직접 가진 문단이 많을수록 본문일 가능성이 높습니다.
+        paragraphs = sum(1 for child in element if child.tag in ("p", "li", "br", "h2", "h3"))
+        score = text_length * (1 - _link_density(element, text_length)) * (1 + min(paragraphs, 10) / 10)
+        if score > best_score:
+            best, best_score = element, score
+    return best
+
+def _to_text(element):
+    for block in element.iter(*BLOCK_TAGS):
+        block.tail = "\n" + (block.tail or "")
+    lines = (re.sub(r"[ \t\xa0]+", " ", line).strip() for line in element.text_content().splitlines())
+    return "\n".join(line for line in lines if line)
+
+# 파이썬이 모르는 한국어 문자셋 이름입니다. 브라우저처럼 EUC-KR 계열은 모두 그 확장인 CP949로 읽습니다.
+CHARSET_ALIASES = {"x-windows-949": "cp949", "windows-949": "cp949", "x-euc-kr": "cp949"}
+XML_DECLARATION_PATTERN = re.compile(r"^\s*<\?xml[^>]*\?>")
+
+def _detect_encoding(html):
+    # <meta charset>이 없으면 UTF-8로 간주합니다.
+    match = META_CHARSET_PATTERN.search(html[:4096])
+    return match.group(1).decode("ascii") if match else "utf-8"
+
+def _resolve_encoding(label):
+    # libxml2는 ks_c_5601-1987 같은 이름을 모르므로 문자셋 이름은 파이썬 코덱으로 풀고, 모르는 이름이면 UTF-8로 읽습니다.
+    label = label.strip().lower()
+    try:
+        name = codecs.lookup(CHARSET_ALIASES.get(label, label)).name
+    except LookupError:
+        return "utf-8"
+    return "cp949" if name == "euc_kr" else name
+
+def _decode_html(html, encoding=None):
+    if html.startswith(codecs.BOM_UTF8):
+        return html[len(codecs.BOM_UTF8):].decode("utf-8", errors="replace")
+    return html.decode(_resolve_encoding(encoding or _detect_encoding(html)), errors="replace")
+
+def extract_main_text(html, encoding=None):
+    # 바이트는 파이썬에서 디코딩하여 문자열로 lxml에 넘깁니다. 문자열에는 XML 인코딩 선언이 있으면 안 되므로 지웁니다.
+    if isinstance(html, bytes):
+        html = _decode_html(html, encoding)
+    root = lxml.html.document_fromstring(XML_DECLARATION_PATTERN.sub("", html, count=1))
+    body = root.find("body")
+    if body is None:
+        body = root
+    _drop_hidden(body)
+    unpruned = copy.deepcopy(body)
+    _drop_noise(body)
+    main = _find_main_content(body)
+    if main is None or _text_length(main) < _text_length(body) * MIN_MAIN_CONTENT_RATIO:
+        main = body
+    if _text_length(main) < _text_length(unpruned) * MIN_PRUNED_RATIO:
+        main = unpruned
+    return _to_text(main)
+
+def _response_encoding(response):
+    # HTTP 헤더에 문자셋이 있을 때만 지정하고, 없으면 문서의 <meta charset>을 따릅니다.
+    return response.encoding if "charset" in response.headers.get("content-type", "").lower() else None
+
+# --- 채용 공고 URL 본문 추출 ---
+def fetch_page_text(url, timeout=5, use_cache=True, refresh=False):
+    # refresh=True는 저장된 결과를 무시하고 다시 받아 캐시를 갱신합니다.
+    cache_key = make_cache_key(EXTRACTOR_VERSION, url)
+    cached = _page_cache.get(cache_key) if use_cache and not refresh else None
+    if cached and time.time() - cached["fetched_at"] < URL_CACHE_FRESH_SECONDS:
+        telemetry.record_span("url.fetch", 0, cache_hit=True)
+        return cached["text"]
+
+    headers = {}
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached and cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+
+    with telemetry.span("url.fetch", cache_hit=False) as span:
+        response = get_session().get(url, headers=headers, timeout=timeout)
+        span.update(status_code=response.status_code, input_bytes=len(response.content))
+        if response.status_code == 304 and cached:
+            # 바뀌지 않았으면 본문을 다시 추출하지 않고 저장된 텍스트의 유효 기간만 늘립니다.
+            span.update(cache_hit=True, revalidated=True)
+            _page_cache.set(cache_key, {**cached, "fetched_at": time.time()})
+            return cached["text"]
+        response.raise_for_status()
+
+    with telemetry.span("url.parse", input_bytes=len(response.content)) as span:
+        text = extract_main_text(response.content, _response_encoding(response))
+        span["output_chars"] = len(text)
+    if not text.strip():
+        # 빈 결과는 저장하지 않고 오류로 알려, 입력된 공고 내용을 빈 텍스트로 덮어쓰지 않게 합니다.
+        raise ValueError("페이지에서 채용 공고 내용을 찾지 못했습니다.")
+
+    if use_cache:
+        _page_cache.set(cache_key, {
+            "text": text,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+        })
+    return text